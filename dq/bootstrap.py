@@ -1,30 +1,51 @@
 from __future__ import annotations
 
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 import streamlit as st
+from sqlalchemy import func
 from sqlmodel import select
 
 from .db import init_db, session
-from .ingest import ingest_risk_factor
-from .models import RiskFactor
+from .settings import settings
+from .ingest import ingest_risk_factor, prefetch_batched
+from .models import DataSource, DQRunCache, Observation, RiskFactor
 from .universe import load_universe
-from .engine import load_series, run_dq
+from .engine import peer_ids, rules_version, run_dq_with_frame, window_start
 
 
 UNIVERSE_PATH = Path("dq/config/universe.yml")
 
 
-def ingest_universe(start: date, end: date, universe_path: Path = UNIVERSE_PATH) -> list[dict[str, Any]]:
+def _workers(max_workers: int | None, n_tasks: int) -> int:
+    n = settings.parallelism if max_workers is None else max_workers
+    return max(1, min(int(n), n_tasks))
+
+
+def ingest_universe(
+    start: date,
+    end: date,
+    universe_path: Path = UNIVERSE_PATH,
+    max_workers: int | None = None,
+    bulk: bool = True,
+) -> list[dict[str, Any]]:
     init_db()
     rfs = load_universe(universe_path)
-    results: list[dict[str, Any]] = []
-    for rf in rfs:
-        results.append(ingest_risk_factor(rf, start, end))
-    return results
+    if bulk:
+        # bulk=False: per-symbol fetches and row-by-row inserts (the unbatched path, for debugging)
+        prefetch_batched(rfs, start, end)
+    workers = _workers(max_workers, len(rfs))
+    if workers == 1:
+        return [ingest_risk_factor(rf, start, end, bulk=bulk) for rf in rfs]
+
+    # network + DB bound: threads overlap vendor latency; map() keeps universe order
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(lambda rf: ingest_risk_factor(rf, start, end, bulk=bulk), rfs))
 
 
 def list_risk_factors() -> list[RiskFactor]:
@@ -32,35 +53,151 @@ def list_risk_factors() -> list[RiskFactor]:
         return list(s.exec(select(RiskFactor).order_by(RiskFactor.asset_class, RiskFactor.id)).all())
 
 
-def run_dq_for_all(asof: date, lookback_days: int = 400) -> list[int]:
+def bulk_load_observations(
+    asof: date, lookback_days: int, rf_ids: list[str] | None = None
+) -> dict[str, pd.DataFrame]:
+    """One query for the whole [asof - lookback_days, asof] window, split per risk factor."""
+    q = (
+        select(Observation.risk_factor_id, Observation.obs_date, Observation.value, DataSource.name)
+        .join(DataSource, Observation.source_id == DataSource.id)
+        .where(
+            Observation.obs_date >= window_start(asof, lookback_days), Observation.obs_date <= asof
+        )
+    )
+    if rf_ids is not None:
+        q = q.where(Observation.risk_factor_id.in_(rf_ids))
+    with session() as s:
+        rows = s.exec(q).all()
+
+    df = pd.DataFrame(rows, columns=["risk_factor_id", "date", "value", "source"])
+    return {
+        str(rf_id): g[["date", "value", "source"]].reset_index(drop=True)
+        for rf_id, g in df.groupby("risk_factor_id")
+    }
+
+
+def dq_run_fingerprints(rf_ids: list[str], asof: date, lookback_days: int) -> dict[str, str]:
+    """
+    Cheap per-risk-factor fingerprint of the observations in the DQ window
+    (row count, latest obs_date, latest id), from one grouped query on (risk_factor_id, obs_date).
+    """
+    q = (
+        select(
+            Observation.risk_factor_id,
+            func.count(),
+            func.max(Observation.obs_date),
+            func.max(Observation.id),
+        )
+        .where(
+            Observation.risk_factor_id.in_(rf_ids),
+            Observation.obs_date >= window_start(asof, lookback_days),
+            Observation.obs_date <= asof,
+        )
+        .group_by(Observation.risk_factor_id)
+    )
+    with session() as s:
+        rows = s.exec(q).all()
+    return {str(rf_id): f"{n}:{max_d}:{max_id}" for rf_id, n, max_d, max_id in rows}
+
+
+def _run_fingerprint(rf: RiskFactor, fps: dict[str, str]) -> str:
+    # a run also reads its peers (US2Y, FX legs), so they are part of its fingerprint; so are the
+    # rules themselves (parameters + code), so a rule change re-runs everything
+    ids = (rf.id,) + peer_ids(rf.asset_class, rf.id)
+    raw = "|".join([f"rules={rules_version()}"] + [f"{i}={fps.get(i, '-')}" for i in ids])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _run_one(
+    rf: RiskFactor, asof: date, lookback_days: int, frames: dict[str, pd.DataFrame]
+) -> tuple[int | None, str | None]:
+    df = frames.get(rf.id)
+    if df is None:
+        return None, rf.id
+
+    try:
+        run_id = run_dq_with_frame(
+            asset_class=rf.asset_class,
+            risk_factor_id=rf.id,
+            asof=asof,
+            df=df,
+            lookback_days=lookback_days,
+            peer_frames=frames,
+        )
+    except Exception as e:
+        return None, f"{rf.id} (error: {e})"
+    return run_id, None
+
+
+def run_dq_for_all(
+    asof: date, lookback_days: int = 400, max_workers: int | None = None, force: bool = False
+) -> tuple[list[int], list[str]]:
+    """
+    DQ every risk factor as of 'asof'. Risk factors whose observations (and peers') and rules are
+    unchanged since the last successful run for the same asof/lookback are skipped unless
+    force=True.
+    Returns (new dq_run ids, ids of the risk factors skipped as unchanged).
+    """
     init_db()
-    rfs = list_risk_factors()
-    run_ids: list[int] = []
-    skipped: list[str] = []
+    all_rfs = list_risk_factors()
+    fps = dq_run_fingerprints([rf.id for rf in all_rfs], asof, lookback_days)
+    run_fps = {rf.id: _run_fingerprint(rf, fps) for rf in all_rfs}
+
+    with session() as s:
+        cached = {
+            c.risk_factor_id: c.fingerprint
+            for c in s.exec(
+                select(DQRunCache).where(
+                    DQRunCache.asof == asof, DQRunCache.lookback_days == lookback_days
+                )
+            ).all()
+        }
+    rfs = [rf for rf in all_rfs if force or cached.get(rf.id) != run_fps[rf.id]]
+    rerun = {rf.id for rf in rfs}
+    unchanged = [rf.id for rf in all_rfs if rf.id not in rerun]
 
-    for rf in rfs:
-        series_by_src = load_series(rf.id)
-        if not series_by_src:
-            skipped.append(rf.id)
-            continue
+    needed = {rf.id for rf in rfs} | {p for rf in rfs for p in peer_ids(rf.asset_class, rf.id)}
+    frames = bulk_load_observations(asof, lookback_days, sorted(needed)) if rfs else {}
+    workers = _workers(max_workers, len(rfs))
 
-        try:
-            run_ids.append(
-                run_dq(
-                    asset_class=rf.asset_class,
+    if workers == 1:
+        outcomes = [_run_one(rf, asof, lookback_days, frames) for rf in rfs]
+    else:
+        outcomes = [(None, None)] * len(rfs)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            order = {
+                ex.submit(_run_one, rf, asof, lookback_days, frames): i for i, rf in enumerate(rfs)
+            }
+            for fut in as_completed(order):
+                outcomes[order[fut]] = fut.result()
+
+    run_ids = [run_id for run_id, _ in outcomes if run_id is not None]
+    skipped = [msg for _, msg in outcomes if msg is not None]
+
+    with session() as s:
+        for rf, (run_id, _) in zip(rfs, outcomes):
+            if run_id is None:
+                continue
+            s.merge(
+                DQRunCache(
                     risk_factor_id=rf.id,
                     asof=asof,
                     lookback_days=lookback_days,
+                    fingerprint=run_fps[rf.id],
+                    dq_run_id=run_id,
                 )
             )
-        except Exception as e:
-            skipped.append(f"{rf.id} (error: {e})")
-            continue
+        s.commit()
 
     if skipped:
         try:
             st.warning("Skipped risk factors with no data: " + ", ".join(skipped))
         except Exception:
             pass
+    if unchanged:
+        try:
+            st.info("Unchanged since last DQ run (not re-run): " + ", ".join(unchanged))
+        except Exception:
+            pass
 
-    return run_ids
+    return run_ids, unchanged
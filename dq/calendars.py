@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from datetime import date
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from pandas.tseries.holiday import (
     AbstractHolidayCalendar,
@@ -14,7 +16,7 @@ from pandas.tseries.holiday import (
     GoodFriday,
     Easter,
 )
-from pandas.tseries.offsets import CustomBusinessDay, Day
+from pandas.tseries.offsets import Day
 
 
 # Reasonable NYSE-like holiday set (good enough for VaR DQ demo)
@@ -63,24 +65,29 @@ class TARGETLikeCalendar(AbstractHolidayCalendar):
     ]
 
 
-def expected_dates(asset_class: str, start: date, end: date) -> set[date]:
-    start_ts = pd.Timestamp(start)
-    end_ts = pd.Timestamp(end)
+# Shared instances: AbstractHolidayCalendar caches holidays() per instance
+_CALENDARS: dict[str, AbstractHolidayCalendar] = {
+    "equities": NYSEHolidayCalendar(),
+    "rates": USTreasuryHolidayCalendar(),
+    "fx": TARGETLikeCalendar(),
+}
 
-    if asset_class == "equities":
-        hol = NYSEHolidayCalendar().holidays(start_ts, end_ts)
-        cbd = CustomBusinessDay(holidays=hol)
-        return set(pd.date_range(start_ts, end_ts, freq=cbd).date)
 
-    if asset_class == "rates":
-        hol = USTreasuryHolidayCalendar().holidays(start_ts, end_ts)
-        cbd = CustomBusinessDay(holidays=hol)
-        return set(pd.date_range(start_ts, end_ts, freq=cbd).date)
+@lru_cache(maxsize=256)
+def expected_index(asset_class: str, start: date, end: date) -> pd.DatetimeIndex:
+    # numpy business-day mask over a datetime64[D] range;
+    # no bdate_range / CustomBusinessDay per call
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    cal = _CALENDARS.get(asset_class)
+    # commodities fallback: weekdays (avoid overengineering for demo)
+    holidays = (
+        cal.holidays(pd.Timestamp(start), pd.Timestamp(end)).values.astype("datetime64[D]")
+        if cal is not None
+        else np.array([], dtype="datetime64[D]")
+    )
+    return pd.DatetimeIndex(days[np.is_busday(days, holidays=holidays)])
 
-    if asset_class == "fx":
-        hol = TARGETLikeCalendar().holidays(start_ts, end_ts)
-        cbd = CustomBusinessDay(holidays=hol)
-        return set(pd.date_range(start_ts, end_ts, freq=cbd).date)
 
-    # commodities fallback: weekdays (avoid overengineering for demo)
-    return set(pd.bdate_range(start_ts, end_ts).date)
+@lru_cache(maxsize=256)
+def expected_dates(asset_class: str, start: date, end: date) -> frozenset[date]:
+    return frozenset(expected_index(asset_class, start, end).date)
@@ -1,24 +1,41 @@
 from __future__ import annotations
 
+from datetime import date
+
 from sqlmodel import text
 
 from .db import init_db, session
 
 
-def dedupe_observations() -> int:
+def dedupe_observations(since: date | None = None) -> int:
+    """
+    Keep the latest row (highest id) per (risk_factor_id, source_id, obs_date).
+    Pass 'since' to only rescan recent observations on re-runs.
+    """
     init_db()
+    # single pass with row_number() instead of NOT IN (SELECT MAX(id) ... GROUP BY ...)
+    where = "WHERE obs_date >= :since" if since is not None else ""
+    params = {"since": since} if since is not None else {}
     with session() as s:
         result = s.exec(
             text(
-                """
+                f"""
                 DELETE FROM observation
-                WHERE id NOT IN (
-                    SELECT MAX(id)
-                    FROM observation
-                    GROUP BY risk_factor_id, source_id, obs_date
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id,
+                               row_number() OVER (
+                                   PARTITION BY risk_factor_id, source_id, obs_date
+                                   ORDER BY id DESC
+                               ) AS rn
+                        FROM observation
+                        {where}
+                    ) ranked
+                    WHERE rn > 1
                 );
                 """
-            )
+            ),
+            params=params,
         )
         s.commit()
         return int(getattr(result, "rowcount", 0) or 0)
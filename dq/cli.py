@@ -7,7 +7,7 @@ from rich.table import Table
 
 from .db import init_db
 from .universe import load_universe
-from .ingest import ingest_risk_factor
+from .ingest import ingest_risk_factor, prefetch_batched
 from .engine import run_dq
 from .pack import make_pack
 from .cleanup import dedupe_observations
@@ -33,12 +33,22 @@ def ingest(
     start: str = typer.Option(..., help="YYYY-MM-DD"),
     end: str = typer.Option(..., help="YYYY-MM-DD"),
     universe_path: Path = typer.Option(Path("dq/config/universe.yml")),
+    bulk: bool = typer.Option(
+        True,
+        "--bulk/--no-bulk",
+        help=(
+            "Batch vendor downloads (yfinance prefetch) and DB inserts; "
+            "--no-bulk fetches per symbol and inserts row by row"
+        ),
+    ),
 ):
     if what != "universe":
         raise typer.BadParameter("Only 'universe' is supported")
     start_d, end_d = parse_date(start), parse_date(end)
 
     rfs = load_universe(universe_path)
+    if bulk:
+        prefetch_batched(rfs, start_d, end_d)
     t = Table(title="Ingestion results")
     t.add_column("Risk Factor")
     t.add_column("Source")
@@ -47,7 +57,7 @@ def ingest(
     t.add_column("Error")
 
     for rf in rfs:
-        res = ingest_risk_factor(rf, start_d, end_d)
+        res = ingest_risk_factor(rf, start_d, end_d, bulk=bulk)
         for row in res["results"]:
             t.add_row(res["risk_factor"], row["source"], row["symbol"], str(row["inserted"]), row["error"][:60])
     rprint(t)
@@ -71,10 +81,15 @@ def pack(from_date: str = typer.Option(..., "--from"), to_date: str = typer.Opti
 
 
 @app.command("cleanup")
-def cleanup_cmd(target: str = typer.Argument(..., help="dedupe-observations")):
+def cleanup_cmd(
+    target: str = typer.Argument(..., help="dedupe-observations"),
+    since: str = typer.Option(
+        None, "--since", help="YYYY-MM-DD; only dedupe observations from this date"
+    ),
+):
     if target != "dedupe-observations":
         raise typer.BadParameter("Only 'dedupe-observations' is supported")
-    deleted = dedupe_observations()
+    deleted = dedupe_observations(parse_date(since) if since else None)
     rprint(f"[green]Cleanup complete.[/green] deleted={deleted}")
 
 @app.command()
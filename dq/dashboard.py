@@ -6,50 +6,74 @@ import streamlit as st
 import plotly.graph_objects as go
 from sqlmodel import select
 
-from .db import session, init_db
+from .db import session, init_db, read_frame
 from .models import DQException, ExceptionAction, Observation, DataSource, RiskFactor
 from .bootstrap import ingest_universe, run_dq_for_all
 from .dq_pack import generate_dq_pack
 
 
+@st.cache_data(ttl=30, show_spinner=False)
 def _load_exceptions(from_date: date, to_date: date, rf: str, status: str) -> pd.DataFrame:
-    with session() as s:
-        q = select(DQException).where(DQException.obs_date >= from_date, DQException.obs_date <= to_date)
-        if rf != "ALL":
-            q = q.where(DQException.risk_factor_id == rf)
-        if status != "ALL":
-            q = q.where(DQException.status == status)
-        rows = s.exec(q).all()
-    return pd.DataFrame([r.model_dump() for r in rows]) if rows else pd.DataFrame()
-
-
+    q = select(DQException.__table__).where(
+        DQException.obs_date >= from_date, DQException.obs_date <= to_date
+    )
+    if rf != "ALL":
+        q = q.where(DQException.risk_factor_id == rf)
+    if status != "ALL":
+        q = q.where(DQException.status == status)
+    df = read_frame(q)
+    return df if not df.empty else pd.DataFrame()
+
+
+@st.cache_data(ttl=60)
 def _list_rfs() -> list[str]:
     with session() as s:
         rows = s.exec(select(RiskFactor.id).order_by(RiskFactor.id)).all()
     return [r[0] for r in rows]
 
 
-def _load_series(rf_id: str) -> dict[str, pd.Series]:
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_series(
+    rf_id: str, win_from: date | None = None, win_to: date | None = None
+) -> dict[str, pd.Series]:
+    q = (
+        select(Observation.obs_date, Observation.value, DataSource.name, DataSource.symbol)
+        .join(DataSource, Observation.source_id == DataSource.id)
+        .where(Observation.risk_factor_id == rf_id)
+    )
+    if win_from is not None:
+        q = q.where(Observation.obs_date >= win_from)
+    if win_to is not None:
+        q = q.where(Observation.obs_date <= win_to)
     with session() as s:
-        rows = s.exec(
-            select(Observation.obs_date, Observation.value, DataSource.name, DataSource.symbol)
-            .join(DataSource, Observation.source_id == DataSource.id)
-            .where(Observation.risk_factor_id == rf_id)
-        ).all()
+        rows = s.exec(q).all()
     df = pd.DataFrame(rows, columns=["date", "value", "source", "symbol"])
     out: dict[str, pd.Series] = {}
     if df.empty:
         return out
     for (src, sym), g in df.groupby(["source", "symbol"]):
         ser = pd.Series(
-            g["value"].values,
-            index=pd.to_datetime(g["date"]).dt.date,
+            g["value"].to_numpy(),
+            index=pd.DatetimeIndex(g["date"]),
             name=f"{src}:{sym}",
         ).sort_index()
         out[f"{src}:{sym}"] = ser
     return out
 
 
+def _invalidate_caches() -> None:
+    st.cache_data.clear()
+    st.session_state.pop("by_rf", None)
+    st.session_state.pop("by_rf_key", None)
+
+
+@st.cache_resource
+def _init_db_once() -> bool:
+    # schema/index checks once per server process, not on every rerun
+    init_db()
+    return True
+
+
 def _plot(series_dict: dict[str, pd.Series], ex: pd.DataFrame):
     fig = go.Figure()
     for name, s in series_dict.items():
@@ -57,17 +81,21 @@ def _plot(series_dict: dict[str, pd.Series], ex: pd.DataFrame):
     if ex is not None and not ex.empty and series_dict:
         first = next(iter(series_dict.values()))
         ex_dates = ex["obs_date"].tolist()
-        ex_y = [first.get(d, None) for d in ex_dates]
+        ex_y = [first.get(pd.Timestamp(d), None) for d in ex_dates]
         fig.add_trace(go.Scatter(x=ex_dates, y=ex_y, mode="markers", name="exceptions"))
     st.plotly_chart(fig, width="stretch")
 
 
 def main():
     st.set_page_config(page_title="Market Data DQ Platform", layout="wide")
-    init_db()
+    _init_db_once()
 
     st.title("Market Data DQ Platform")
 
+    if st.sidebar.button("Refresh data"):
+        _invalidate_caches()
+        st.rerun()
+
     # -----------------------------
     # Setup / Run panel (Cloud needs this)
     # -----------------------------
@@ -93,14 +121,23 @@ def main():
                         if row.get("error"):
                             errors += 1
                 st.success(f"Ingested rows: {total_inserted}. Source-errors: {errors}.")
+                _invalidate_caches()
                 st.rerun()
 
         with c2:
+            force = st.checkbox(
+                "Force re-run", value=False, help="Re-run risk factors whose data is unchanged"
+            )
             if st.button("2) Run DQ (all RFs)"):
                 with st.status("Running DQ checks...", expanded=True) as status:
-                    run_ids = run_dq_for_all(asof=asof, lookback_days=int(dq_lookback_days))
+                    run_ids, unchanged = run_dq_for_all(
+                        asof=asof, lookback_days=int(dq_lookback_days), force=force
+                    )
                     status.update(label="DQ runs complete", state="complete")
-                st.success(f"Completed DQ runs: {len(run_ids)}")
+                st.success(
+                    f"Completed DQ runs: {len(run_ids)}. Unchanged (not re-run): {len(unchanged)}."
+                )
+                _invalidate_caches()
                 st.rerun()
 
         st.markdown("---")
@@ -152,6 +189,20 @@ def main():
     from_d = to_d - timedelta(days=int(lookback))
     df = _load_exceptions(from_d, to_d, rf, status)
 
+    # group once per filter set and loaded frame; drilldown selections then reuse the per-RF frames.
+    # _load_exceptions reloads on its TTL (new runs, status changes elsewhere), so the key carries
+    # a fingerprint of the rows (ids + statuses) as well as the filters
+    df_sig = (
+        (len(df), int(pd.util.hash_pandas_object(df[["id", "status"]], index=False).sum()))
+        if not df.empty
+        else (0, 0)
+    )
+    by_rf_key = (from_d, to_d, rf, status, df_sig)
+    if st.session_state.get("by_rf_key") != by_rf_key:
+        st.session_state["by_rf"] = dict(iter(df.groupby("risk_factor_id"))) if not df.empty else {}
+        st.session_state["by_rf_key"] = by_rf_key
+    by_rf: dict[str, pd.DataFrame] = st.session_state["by_rf"]
+
     left, right = st.columns([1, 1])
     with left:
         st.subheader("Exception Queue")
@@ -173,15 +224,13 @@ def main():
         )
         st.json(ex_row["details"])
 
-        series = _load_series(ex_row["risk_factor_id"])
         win_from = ex_row["obs_date"] - timedelta(days=60)
         win_to = ex_row["obs_date"] + timedelta(days=10)
-        series = {k: v.loc[(v.index >= win_from) & (v.index <= win_to)] for k, v in series.items()}
-        ex2 = df[
-            (df["risk_factor_id"] == ex_row["risk_factor_id"])
-            & (df["obs_date"] >= win_from)
-            & (df["obs_date"] <= win_to)
-        ]
+        series = _load_series(ex_row["risk_factor_id"], win_from, win_to)
+        rf_ex = by_rf.get(ex_row["risk_factor_id"])
+        if rf_ex is None:
+            rf_ex = df[df["risk_factor_id"] == ex_row["risk_factor_id"]]
+        ex2 = rf_ex[(rf_ex["obs_date"] >= win_from) & (rf_ex["obs_date"] <= win_to)]
         _plot(series, ex2)
 
         st.divider()
@@ -201,6 +250,7 @@ def main():
                 s.add(ex_obj)
                 s.commit()
             st.success("Recorded.")
+            _invalidate_caches()
             st.rerun()
 
         st.subheader("Action history")
@@ -1,12 +1,44 @@
+from functools import lru_cache
+
+import pandas as pd
 from sqlmodel import SQLModel, create_engine, Session
 from .settings import settings
 
+@lru_cache(maxsize=1)
 def get_engine():
-    return create_engine(settings.database_url, echo=False)
+    # one engine (and connection pool) per process; rebuilding it per session defeats pooling
+    url = settings.database_url
+    if url.startswith("sqlite"):
+        # threaded ingestion / DQ sweeps share pooled connections across threads
+        return create_engine(
+            url,
+            echo=False,
+            pool_pre_ping=True,
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+    return create_engine(url, echo=False, pool_pre_ping=True, pool_size=8, max_overflow=16)
+
+def reset_engine():
+    # for tests / settings changes: drop the cached engine and its pool
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+    get_engine.cache_clear()
 
 def init_db():
-    SQLModel.metadata.create_all(get_engine())
+    engine = get_engine()
+    SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist, so add indexes introduced after they were created
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 def session():
     # critical for Streamlit + short-lived sessions
     return Session(get_engine(), expire_on_commit=False)
+
+def read_frame(stmt, chunksize: int = 5000) -> pd.DataFrame:
+    # report reads: stream the cursor (server-side on Postgres) in chunks rather than fetchall()
+    with session() as s:
+        conn = s.connection().execution_options(stream_results=True)
+        chunks = list(pd.read_sql_query(stmt, conn, chunksize=chunksize))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
@@ -5,17 +5,26 @@ from datetime import date, datetime, timedelta, timezone
 from io import BytesIO
 from typing import Any
 
+import orjson
 import pandas as pd
+from jinja2 import Environment, PackageLoader
+from markupsafe import Markup
 from sqlmodel import select
+from sqlalchemy import func
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
-from .db import session
+from .db import read_frame, session
 from .models import DQException, ExceptionAction, DQRun
 
+# compiled once; table snippets are pre-rendered (and escaped) by DataFrame.to_html
+_HTML_TEMPLATE = Environment(
+    loader=PackageLoader("dq", "templates"), autoescape=True
+).get_template("pack.html.j2")
+
 
 @dataclass(frozen=True)
 class DQPack:
@@ -29,26 +38,48 @@ def _utc_now_str() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
 
 
-def _safe_json(x: Any) -> str:
+def _safe_json(x: Any, sort_keys: bool = True) -> str:
     if x is None:
         return ""
     # details is often dict/json; stringify cleanly
     try:
-        import json
-
-        return json.dumps(x, sort_keys=True)
-    except Exception:
+        return orjson.dumps(x, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode()
+    except TypeError:
         return str(x)
 
 
-def _fetch_exceptions(from_date: date, to_date: date, status: str | None = None) -> pd.DataFrame:
+def _json_column(col: pd.Series) -> pd.Series:
+    # one try around the whole column; per-row fallback only if something isn't serialisable
+    try:
+        return col.map(
+            lambda x: orjson.dumps(x, option=orjson.OPT_SORT_KEYS).decode() if x is not None else ""
+        )
+    except TypeError:
+        return col.map(_safe_json)
+
+
+def _exception_filters(from_date: date, to_date: date, status: str | None) -> list[Any]:
+    conds = [DQException.obs_date >= from_date, DQException.obs_date <= to_date]
+    if status and status.lower() != "all":
+        conds.append(DQException.status == status)
+    return conds
+
+
+def _fetch_top_exceptions(
+    from_date: date, to_date: date, status: str | None = None, limit: int = 50
+) -> pd.DataFrame:
+    # sort + limit in SQL: only the rows that make it into the pack leave the DB
+    q = (
+        select(DQException.__table__)
+        .where(*_exception_filters(from_date, to_date, status))
+        .order_by(DQException.severity.desc(), DQException.obs_date.desc())
+        .limit(limit)
+    )
+    # report-only read: straight from the cursor into pandas, no ORM hydration
     with session() as s:
-        q = select(DQException).where(DQException.obs_date >= from_date, DQException.obs_date <= to_date)
-        if status and status.lower() != "all":
-            q = q.where(DQException.status == status)
-        rows = s.exec(q).all()
+        df = pd.read_sql_query(q, s.connection())
 
-    if not rows:
+    if df.empty:
         return pd.DataFrame(
             columns=[
                 "id",
@@ -63,37 +94,49 @@ def _fetch_exceptions(from_date: date, to_date: date, status: str | None = None)
             ]
         )
 
-    df = pd.DataFrame([r.model_dump() for r in rows])
-
     # normalize columns
     if "details" in df.columns:
-        df["details"] = df["details"].map(_safe_json)
+        df["details"] = _json_column(df["details"])
     if "suggested_action" not in df.columns:
         df["suggested_action"] = ""
     if "dq_run_id" not in df.columns:
         df["dq_run_id"] = None
 
-    # ordering
-    if "severity" in df.columns:
-        df = df.sort_values(["severity", "obs_date"], ascending=[False, False])
-    else:
-        df = df.sort_values(["obs_date"], ascending=[False])
-
     return df
 
 
-def _fetch_actions(exception_ids: list[int]) -> pd.DataFrame:
-    if not exception_ids:
-        return pd.DataFrame(columns=["exception_id", "action", "comment", "actor", "created_at", "ts", "id"])
-
+def _fetch_kpi_counts(
+    from_date: date, to_date: date, status: str | None = None
+) -> tuple[int, pd.DataFrame, pd.DataFrame]:
+    """(total, by_rule, by_risk_factor) for the window, aggregated SQL-side."""
+    conds = _exception_filters(from_date, to_date, status)
+    n = func.count().label("count")
     with session() as s:
-        q = select(ExceptionAction).where(ExceptionAction.exception_id.in_(exception_ids))
-        rows = s.exec(q).all()
+        by_rule = pd.read_sql_query(
+            select(DQException.rule, n)
+            .where(*conds)
+            .group_by(DQException.rule)
+            .order_by(n.desc(), DQException.rule),
+            s.connection(),
+        )
+        by_rf = pd.read_sql_query(
+            select(DQException.risk_factor_id, n)
+            .where(*conds)
+            .group_by(DQException.risk_factor_id)
+            .order_by(n.desc(), DQException.risk_factor_id),
+            s.connection(),
+        )
+    return int(by_rule["count"].sum()), by_rule, by_rf
+
+
+def _fetch_actions(from_date: date, to_date: date, status: str | None = None) -> pd.DataFrame:
+    in_window = select(DQException.id).where(*_exception_filters(from_date, to_date, status))
+    q = select(ExceptionAction.__table__).where(ExceptionAction.exception_id.in_(in_window))
+    df = read_frame(q)
 
-    if not rows:
+    if df.empty:
         return pd.DataFrame(columns=["exception_id", "action", "comment", "actor", "created_at", "ts", "id"])
 
-    df = pd.DataFrame([r.model_dump() for r in rows])
     return df
 
 
@@ -109,16 +152,19 @@ def _latest_run_meta() -> dict[str, Any]:
 def _df_to_html_table(df: pd.DataFrame, max_rows: int = 50) -> str:
     if df.empty:
         return "<p><em>No rows.</em></p>"
-    view = df.head(max_rows).copy()
-    return view.to_html(index=False, escape=True)
+    # head() is a cheap view; only the rows that get rendered are formatted
+    return df.head(max_rows).to_html(index=False, escape=True, float_format="%.4g")
 
 
 def _pdf_table_from_df(df: pd.DataFrame, max_rows: int = 40) -> Table:
     if df.empty:
         df = pd.DataFrame([{"info": "No rows."}])
 
-    view = df.head(max_rows).copy()
-    data = [list(view.columns)] + view.astype(str).values.tolist()
+    view = df.head(max_rows)
+    # stringify row by row instead of materialising an object copy of the frame via astype(str)
+    data = [list(view.columns)] + [
+        [str(v) for v in row] for row in view.itertuples(index=False, name=None)
+    ]
 
     t = Table(data, repeatRows=1)
     t.setStyle(
@@ -145,24 +191,19 @@ def generate_dq_pack(asof: date, lookback_days: int, status: str = "open") -> DQ
     from_date = asof - timedelta(days=int(lookback_days))
     to_date = asof
 
-    ex_df = _fetch_exceptions(from_date, to_date, status=status)
+    ex_df = _fetch_top_exceptions(from_date, to_date, status=status, limit=50)
 
     # KPIs
-    total = len(ex_df)
-    by_rule = ex_df.groupby("rule", dropna=False).size().reset_index(name="count").sort_values("count", ascending=False)
-    by_rf = (
-        ex_df.groupby("risk_factor_id", dropna=False).size().reset_index(name="count").sort_values("count", ascending=False)
-    )
+    total, by_rule, by_rf = _fetch_kpi_counts(from_date, to_date, status=status)
 
-    if "severity" in ex_df.columns and not ex_df.empty:
-        top = ex_df[["id", "obs_date", "risk_factor_id", "rule", "severity", "status", "suggested_action"]].head(50)
-    else:
-        top = ex_df[["id", "obs_date", "risk_factor_id", "rule", "status", "suggested_action"]].head(50)
+    top = ex_df[
+        ["id", "obs_date", "risk_factor_id", "rule", "severity", "status", "suggested_action"]
+    ]
 
     # Actions summary
-    actions_df = _fetch_actions(ex_df["id"].astype(int).tolist() if "id" in ex_df.columns and not ex_df.empty else [])
+    actions_df = _fetch_actions(from_date, to_date, status=status)
     action_kpi = (
-        actions_df.groupby("action", dropna=False).size().reset_index(name="count").sort_values("count", ascending=False)
+        actions_df["action"].value_counts(dropna=False).rename_axis("action").reset_index(name="count")
         if not actions_df.empty
         else pd.DataFrame(columns=["action", "count"])
     )
@@ -170,55 +211,23 @@ def generate_dq_pack(asof: date, lookback_days: int, status: str = "open") -> DQ
     run_meta = _latest_run_meta()
 
     # ---------------- HTML ----------------
-    html = f"""
-    <html>
-    <head>
-      <meta charset="utf-8"/>
-      <style>
-        body {{ font-family: Arial, sans-serif; margin: 24px; }}
-        h1 {{ margin-bottom: 0; }}
-        .meta {{ color: #444; margin-top: 6px; }}
-        .kpi {{ display: flex; gap: 12px; margin: 18px 0; }}
-        .card {{ border: 1px solid #ddd; border-radius: 10px; padding: 12px 14px; }}
-        table {{ border-collapse: collapse; width: 100%; margin: 10px 0 22px 0; }}
-        th, td {{ border: 1px solid #ddd; padding: 6px 8px; font-size: 12px; }}
-        th {{ background: #f3f3f3; text-align: left; }}
-        .small {{ font-size: 12px; color: #444; }}
-      </style>
-    </head>
-    <body>
-      <h1>Market Data DQ Pack</h1>
-      <div class="meta">
-        Generated: {_utc_now_str()}<br/>
-        Window: {from_date.isoformat()} → {to_date.isoformat()} ({lookback_days} days)<br/>
-        Status filter: {status}<br/>
-      </div>
-
-      <div class="kpi">
-        <div class="card"><b>Total exceptions</b><br/>{total}</div>
-        <div class="card"><b>Top risk factor</b><br/>{(by_rf.iloc[0]["risk_factor_id"] if len(by_rf) else "-")}</div>
-        <div class="card"><b>Top rule</b><br/>{(by_rule.iloc[0]["rule"] if len(by_rule) else "-")}</div>
-      </div>
-
-      <h2>Top Exceptions (by severity)</h2>
-      {_df_to_html_table(top, max_rows=50)}
-
-      <h2>Exceptions by Rule</h2>
-      {_df_to_html_table(by_rule, max_rows=50)}
-
-      <h2>Exceptions by Risk Factor</h2>
-      {_df_to_html_table(by_rf, max_rows=50)}
-
-      <h2>Actions Recorded (Audit Trail)</h2>
-      {_df_to_html_table(action_kpi, max_rows=50)}
-
-      <h2>Latest Run Metadata</h2>
-      <div class="small"><pre>{_safe_json(run_meta)}</pre></div>
-    </body>
-    </html>
-    """.strip()
-
-    html_bytes = html.encode("utf-8")
+    html_buf = BytesIO()
+    _HTML_TEMPLATE.stream(
+        generated=_utc_now_str(),
+        from_date=from_date.isoformat(),
+        to_date=to_date.isoformat(),
+        lookback_days=lookback_days,
+        status=status,
+        total=total,
+        top_rf=by_rf.iloc[0]["risk_factor_id"] if len(by_rf) else "-",
+        top_rule=by_rule.iloc[0]["rule"] if len(by_rule) else "-",
+        top_table=Markup(_df_to_html_table(top, max_rows=50)),
+        by_rule_table=Markup(_df_to_html_table(by_rule, max_rows=50)),
+        by_rf_table=Markup(_df_to_html_table(by_rf, max_rows=50)),
+        action_table=Markup(_df_to_html_table(action_kpi, max_rows=50)),
+        run_meta=_safe_json(run_meta, sort_keys=False),
+    ).dump(html_buf, encoding="utf-8")
+    html_bytes = html_buf.getvalue()
 
     # ---------------- PDF ----------------
     pdf_buf = BytesIO()
@@ -228,7 +237,12 @@ def generate_dq_pack(asof: date, lookback_days: int, status: str = "open") -> DQ
     story = []
     story.append(Paragraph("Market Data DQ Pack", styles["Title"]))
     story.append(Paragraph(f"Generated: {_utc_now_str()}", styles["Normal"]))
-    story.append(Paragraph(f"Window: {from_date.isoformat()} → {to_date.isoformat()} ({lookback_days} days)", styles["Normal"]))
+    story.append(
+        Paragraph(
+            f"Window: {from_date.isoformat()} → {to_date.isoformat()} ({lookback_days} days)",
+            styles["Normal"],
+        )
+    )
     story.append(Paragraph(f"Status filter: {status}", styles["Normal"]))
     story.append(Spacer(1, 12))
 
@@ -263,7 +277,7 @@ def generate_dq_pack(asof: date, lookback_days: int, status: str = "open") -> DQ
     story.append(Spacer(1, 12))
 
     story.append(Paragraph("Latest Run Metadata", styles["Heading2"]))
-    story.append(Paragraph(f"<pre>{_safe_json(run_meta)}</pre>", styles["Code"]))
+    story.append(Paragraph(f"<pre>{_safe_json(run_meta, sort_keys=False)}</pre>", styles["Code"]))
 
     doc.build(story)
     pdf_bytes = pdf_buf.getvalue()
@@ -1,74 +1,197 @@
 from __future__ import annotations
-from datetime import date
+import hashlib
+import threading
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
 import pandas as pd
+from sqlalchemy import update
 from sqlmodel import select
+from . import __version__
 from .db import session
-from .models import DQRun, DQException, RiskFactor
+from .models import DataSource, DQRun, DQException, Observation, RiskFactor
 from .rules.spikes import HampelRule
 from .rules.gaps import MissingBdaysRule, StaleRule
 from .rules.reconcile import ReconcileRule
 from .rules.relations import CorrBreakRule, FXTriangleRule
-from .calendars import expected_dates
+from .calendars import expected_index
 
 SPIKE = HampelRule()
 MISSING = MissingBdaysRule()
 STALE = StaleRule()
 RECON = ReconcileRule()
 
+INSERT_BATCH = 10_000
+
+# code that decides which exceptions a run raises; editing any of it invalidates cached runs
+_RULE_SOURCES = ("engine.py", "calendars.py", "rules/*.py")
+
+
+@lru_cache(maxsize=1)
+def rules_version() -> str:
+    """Fingerprint of the package version, the rule parameters and the rule/engine source."""
+    h = hashlib.sha1(__version__.encode("utf-8"))
+    for rule in (SPIKE, MISSING, STALE, RECON):
+        h.update(f"{type(rule).__name__}{sorted(vars(rule).items())!r}".encode("utf-8"))
+    root = Path(__file__).parent
+    for path in sorted(p for pattern in _RULE_SOURCES for p in root.glob(pattern)):
+        h.update(path.read_bytes())
+    return h.hexdigest()
+# Core insert on the table: no ORM instances, identity map or flush for exception rows
+_INSERT_EXCEPTIONS = DQException.__table__.insert()
+
+
+_PREFS_PRIMARY: dict[str, tuple[str, ...]] = {
+    "rates": ("fred", "stooq"),
+    "fx": ("twelvedata", "stooq", "ecb_fx"),
+    "equities": ("twelvedata", "stooq", "yfinance"),
+    "commodities": ("twelvedata", "stooq", "yfinance"),
+}
+_PREFS_SECONDARY: dict[str, tuple[str, ...]] = {
+    "rates": ("stooq", "twelvedata"),
+    "fx": ("stooq", "twelvedata", "ecb_fx"),
+    "equities": ("stooq", "twelvedata"),
+    "commodities": ("stooq", "twelvedata"),
+}
+
+
+@lru_cache(maxsize=128)
+def _pick_sources_cached(asset_class: str, keys: frozenset[str]) -> tuple[str, str | None]:
+    primary = next((p for p in _PREFS_PRIMARY.get(asset_class, ()) if p in keys), None) or min(keys)
+    secondary = next(
+        (p for p in _PREFS_SECONDARY.get(asset_class, ()) if p in keys and p != primary), None
+    )
+    return primary, secondary
+
 
 def _pick_sources(asset_class: str, series_by_src: dict[str, pd.Series]) -> tuple[str, str | None]:
-    prefs_primary = {
-        "rates": ["fred", "stooq"],
-        "fx": ["twelvedata", "stooq", "ecb_fx"],
-        "equities": ["twelvedata", "stooq", "yfinance"],
-        "commodities": ["twelvedata", "stooq", "yfinance"],
-    }
-    prefs_secondary = {
-        "rates": ["stooq", "twelvedata"],
-        "fx": ["stooq", "twelvedata", "ecb_fx"],
-        "equities": ["stooq", "twelvedata"],
-        "commodities": ["stooq", "twelvedata"],
+    return _pick_sources_cached(asset_class, frozenset(series_by_src))
+
+def peer_ids(asset_class: str, risk_factor_id: str) -> tuple[str, ...]:
+    """Other risk factors whose observations feed this factor's run (corr break / FX triangle)."""
+    if asset_class == "rates" and risk_factor_id == "US10Y":
+        return ("US2Y",)
+    if asset_class == "fx" and risk_factor_id == "EURUSD":
+        return ("USDGBP", "EURGBP")
+    return ()
+
+
+def window_start(asof: date, lookback_days: int) -> date:
+    return (pd.Timestamp(asof) - pd.Timedelta(days=lookback_days)).date()
+
+
+def series_from_frame(df: pd.DataFrame, rf_id: str) -> dict[str, pd.Series]:
+    """Split a date/value/source observation frame into one sorted series per source."""
+    if df.empty:
+        return {}
+    # one date conversion + sort/dedup over all sources, then split
+    df = df.assign(date=pd.to_datetime(df["date"]).dt.date)
+    df = df.sort_values(["source", "date"], kind="stable").drop_duplicates(
+        ["source", "date"], keep="last"
+    )
+    return {
+        str(src): pd.Series(g["value"].to_numpy(), index=g["date"].to_numpy(), name=rf_id)
+        for src, g in df.groupby("source", sort=False)
     }
 
-    keys = list(series_by_src.keys())
 
-    primary = None
-    for preferred in prefs_primary.get(asset_class, []):
-        if preferred in series_by_src:
-            primary = preferred
-            break
-    if primary is None:
-        primary = sorted(keys)[0]
+_SERIES_TTL = 300.0
+_SERIES_MAXSIZE = 512
+_SERIES_CACHE: dict[tuple, tuple[float, dict[str, pd.Series]]] = {}
+_SERIES_STATS = {"hits": 0, "misses": 0}
+_SERIES_LOCK = threading.Lock()
 
-    secondary = None
-    for preferred in prefs_secondary.get(asset_class, []):
-        if preferred in series_by_src and preferred != primary:
-            secondary = preferred
-            break
 
-    return primary, secondary
+def clear_series_cache() -> None:
+    """Drop cached load_series results (call after observations change)."""
+    with _SERIES_LOCK:
+        _SERIES_CACHE.clear()
+
+
+def series_cache_info() -> dict[str, int]:
+    with _SERIES_LOCK:
+        return {**_SERIES_STATS, "size": len(_SERIES_CACHE)}
 
-def load_series(rf_id: str) -> dict[str, pd.Series]:
-    from .models import Observation, DataSource
+
+def load_series_multi(
+    rf_ids: list[str] | tuple[str, ...], start: date | None = None, end: date | None = None
+) -> dict[str, dict[str, pd.Series]]:
+    """
+    Per-source series for several risk factors from one IN() query,
+    optionally limited to [start, end].
+    """
+    # peers / triangle legs are re-read by every run on the same asof; keep them for a few minutes
+    now = time.monotonic()
+    out: dict[str, dict[str, pd.Series]] = {}
+    missing = []
+    with _SERIES_LOCK:
+        for rf_id in rf_ids:
+            hit = _SERIES_CACHE.get((rf_id, start, end))
+            if hit is not None and now - hit[0] < _SERIES_TTL:
+                _SERIES_STATS["hits"] += 1
+                out[rf_id] = dict(hit[1])
+            else:
+                _SERIES_STATS["misses"] += 1
+                missing.append(rf_id)
+    if not missing:
+        return out
+
+    q = (
+        select(Observation.risk_factor_id, Observation.obs_date, Observation.value, DataSource.name)
+        .join(DataSource, Observation.source_id == DataSource.id)
+        .where(Observation.risk_factor_id.in_(missing))
+    )
+    # range scan on ix_obs_rf_date instead of pulling each factor's whole history
+    if start is not None:
+        q = q.where(Observation.obs_date >= start)
+    if end is not None:
+        q = q.where(Observation.obs_date <= end)
     with session() as s:
         rows = s.exec(
-            select(Observation.obs_date, Observation.value, DataSource.name)
-            .join(DataSource, Observation.source_id == DataSource.id)
-            .where(Observation.risk_factor_id == rf_id)
+            q.order_by(Observation.risk_factor_id, DataSource.name, Observation.obs_date)
         ).all()
-    df = pd.DataFrame(rows, columns=["date", "value", "source"])
-    out = {}
-    if df.empty:
-        return out
-    for src, g in df.groupby("source"):
-        tmp = pd.DataFrame({"date": pd.to_datetime(g["date"]).dt.date, "value": g["value"].values})
-        tmp = tmp.sort_values("date").drop_duplicates("date", keep="last")
-        ser = pd.Series(tmp["value"].values, index=tmp["date"].values, name=rf_id).sort_index()
-        out[str(src)] = ser
+    df = pd.DataFrame(rows, columns=["risk_factor_id", "date", "value", "source"])
+    groups = {
+        str(k): g[["date", "value", "source"]]
+        for k, g in df.groupby("risk_factor_id", sort=False)
+    }
+
+    with _SERIES_LOCK:
+        for rf_id in missing:
+            by_src = series_from_frame(groups[rf_id], rf_id) if rf_id in groups else {}
+            key = (rf_id, start, end)
+            _SERIES_CACHE.pop(key, None)
+            if len(_SERIES_CACHE) >= _SERIES_MAXSIZE:
+                _SERIES_CACHE.pop(next(iter(_SERIES_CACHE)))  # oldest entry
+            _SERIES_CACHE[key] = (now, by_src)
+            out[rf_id] = dict(by_src)
     return out
 
 
+def load_series(
+    rf_id: str, start: date | None = None, end: date | None = None
+) -> dict[str, pd.Series]:
+    """Per-source series for rf_id, optionally limited to [start, end] in SQL."""
+    return load_series_multi([rf_id], start, end)[rf_id]
+
+
 def run_dq(asset_class: str, risk_factor_id: str, asof: date, lookback_days: int = 400) -> int:
+    return run_dq_with_frame(asset_class, risk_factor_id, asof, None, lookback_days=lookback_days)
+
+
+def run_dq_with_frame(
+    asset_class: str,
+    risk_factor_id: str,
+    asof: date,
+    df: pd.DataFrame | None,
+    lookback_days: int = 400,
+    peer_frames: dict[str, pd.DataFrame] | None = None,
+) -> int:
+    """
+    run_dq on pre-fetched observations (date/value/source frame) instead of querying them.
+    peer_frames supplies US2Y / FX triangle legs by risk factor id; without it they are loaded.
+    """
     # Create run + capture run_id immediately (no detached ORM objects)
     with session() as s:
         rf = s.get(RiskFactor, risk_factor_id)
@@ -82,50 +205,68 @@ def run_dq(asset_class: str, risk_factor_id: str, asof: date, lookback_days: int
             parameters={"lookback_days": lookback_days},
         )
         s.add(run)
-        s.commit()
-        s.refresh(run)  # ensure ID is populated
+        s.commit()  # flush populates the ID; expire_on_commit=False keeps it readable
         run_id = int(run.id)
 
-    series_by_src = load_series(risk_factor_id)
+    start = window_start(asof, lookback_days)
+
+    needed = peer_ids(asset_class, risk_factor_id)
+    if df is None:
+        # primary + corr-break / triangle peers in one IN() query
+        loaded = load_series_multi([risk_factor_id, *needed], start, asof)
+        series_by_src = loaded[risk_factor_id]
+    else:
+        series_by_src = series_from_frame(df, risk_factor_id)
+        loaded = load_series_multi(needed, start, asof) if peer_frames is None and needed else {}
     if not series_by_src:
         raise ValueError(f"No observations for {risk_factor_id}")
 
-    start = (pd.Timestamp(asof) - pd.Timedelta(days=lookback_days)).date()
-    expected = expected_dates(asset_class, start, asof)
+    def peer(rf_id: str) -> dict[str, pd.Series]:
+        if rf_id == risk_factor_id:
+            by_src = series_by_src
+        elif peer_frames is None:
+            by_src = loaded.get(rf_id, {})
+        elif rf_id in peer_frames:
+            by_src = series_from_frame(peer_frames[rf_id], rf_id)
+        else:
+            return {}
+        # same [start, asof] window as the primary, whichever way the peer was loaded
+        windowed = {k: v.loc[start:asof] for k, v in by_src.items()}
+        return {k: v for k, v in windowed.items() if not v.empty}
+    expected = expected_index(asset_class, start, asof)
 
     primary_src, other_src = _pick_sources(asset_class, series_by_src)
-    primary = series_by_src[primary_src].loc[
-        (series_by_src[primary_src].index >= start) & (series_by_src[primary_src].index <= asof)
-    ]
+    # series_from_frame returns date-sorted series, so the window is a label slice, not a mask
+    primary = series_by_src[primary_src].loc[start:asof]
 
     issues = []
-    issues += SPIKE.run(primary)
-    issues += MISSING.run(primary, expected_dates=expected)
-    issues += STALE.run(primary)
+    issues.extend(SPIKE.run(primary))
+    issues.extend(MISSING.run(primary, expected_dates=expected))
+    issues.extend(STALE.run(primary))
 
     if other_src is not None:
-        other = series_by_src[other_src].loc[
-            (series_by_src[other_src].index >= start) & (series_by_src[other_src].index <= asof)
-        ]
-        issues += RECON.run(
-            primary,
-            other_series=other,
-            asset_class=asset_class,
-            source_a=primary_src,
-            source_b=other_src,
+        other = series_by_src[other_src].loc[start:asof]
+        issues.extend(
+            RECON.run(
+                primary,
+                other_series=other,
+                asset_class=asset_class,
+                source_a=primary_src,
+                source_b=other_src,
+            )
         )
 
     if asset_class == "rates" and risk_factor_id == "US10Y":
-        peers = load_series("US2Y")
+        peers = peer("US2Y")
         if peers:
-            s2 = peers[sorted(peers.keys())[0]]
-            issues += CorrBreakRule().run(primary, peer_series=s2)
+            s2 = peers[min(peers)]
+            issues.extend(CorrBreakRule().run(primary, peer_series=s2))
 
     # Only run triangle once per day (anchor on EURUSD run)
     if asset_class == "fx" and risk_factor_id == "EURUSD":
-        eurusd = load_series("EURUSD")
-        usdgbp = load_series("USDGBP")
-        eurgbp = load_series("EURGBP")
+        eurusd = peer("EURUSD")
+        usdgbp = peer("USDGBP")
+        eurgbp = peer("EURGBP")
         buckets = [
             ("twelvedata", "twelvedata", "twelvedata"),
             ("stooq", "stooq", "stooq"),
@@ -134,44 +275,38 @@ def run_dq(asset_class: str, risk_factor_id: str, asof: date, lookback_days: int
 
         for b in buckets:
             if b[0] in ("twelvedata", "stooq"):
-                label, src = b[0], b[1]
-                if (src in eurusd) and (src in usdgbp) and (src in eurgbp):
-                    issues += FXTriangleRule(rule_suffix=label).run(
-                        primary,
-                        ab=eurusd[src],
-                        bc=usdgbp[src],
-                        ac=eurgbp[src],
-                    )
-                    break
+                label, ab_src, bc_src, ac_src = b[0], b[1], b[1], b[1]
             else:
                 label, ab_src, bc_src, ac_src = b
-                if (ab_src in eurusd) and (bc_src in usdgbp) and (ac_src in eurgbp):
-                    issues += FXTriangleRule(rule_suffix=label).run(
-                        primary,
-                        ab=eurusd[ab_src],
-                        bc=usdgbp[bc_src],
-                        ac=eurgbp[ac_src],
+            if (ab_src in eurusd) and (bc_src in usdgbp) and (ac_src in eurgbp):
+                issues.extend(
+                    FXTriangleRule(rule_suffix=label).run(
+                        primary, ab=eurusd[ab_src], bc=usdgbp[bc_src], ac=eurgbp[ac_src]
                     )
-                    break
+                )
+                break
 
     # Persist exceptions + mark run finished using run_id (not run object)
+    rows = [
+        {
+            "dq_run_id": run_id,
+            "risk_factor_id": risk_factor_id,
+            "rule": iss.rule,
+            "obs_date": iss.obs_date,
+            "severity": int(iss.severity),
+            "status": "open",
+            "suggested_action": iss.suggested_action,
+            "details": iss.details,
+        }
+        for iss in issues
+    ]
     with session() as s:
-        for iss in issues:
-            s.add(
-                DQException(
-                    dq_run_id=run_id,
-                    risk_factor_id=risk_factor_id,
-                    rule=iss.rule,
-                    obs_date=iss.obs_date,
-                    severity=int(iss.severity),
-                    status="open",
-                    suggested_action=iss.suggested_action,
-                    details=iss.details,
-                )
-            )
-        run2 = s.get(DQRun, run_id)
-        run2.finished_at = pd.Timestamp.utcnow().to_pydatetime()
-        s.add(run2)
+        # executemany in batches rather than one unit-of-work INSERT per exception
+        for i in range(0, len(rows), INSERT_BATCH):
+            s.execute(_INSERT_EXCEPTIONS, rows[i : i + INSERT_BATCH])
+        s.execute(
+            update(DQRun).where(DQRun.id == run_id).values(finished_at=datetime.utcnow())
+        )
         s.commit()
 
     return run_id
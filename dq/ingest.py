@@ -1,10 +1,17 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+import pandas as pd
+import requests
 from sqlmodel import select
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
-from .db import session
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+from .db import get_engine, session
+from .engine import clear_series_cache
 from .models import RiskFactor, DataSource, Observation
+from .providers.base import ProviderError
+from .providers.parallel import provider_slot
 from .providers.registry import get_provider
 from .universe import RiskFactorSpec
 
@@ -32,6 +39,58 @@ def upsert_data_source(name: str, symbol: str, field: str, meta: dict) -> int:
             s.refresh(ds)
         return int(ds.id)
 
+INSERT_BATCH = 10_000
+
+
+def _transient(exc: BaseException) -> bool:
+    # providers wrap HTTP failures in ProviderError; only retry network blips / 429 / 5xx
+    cause = exc.__cause__ if isinstance(exc, ProviderError) else None
+    if isinstance(cause, requests.HTTPError):
+        return cause.response is not None and cause.response.status_code in (
+            429, 500, 502, 503, 504
+        )
+    return isinstance(cause, (requests.ConnectionError, requests.Timeout))
+
+
+@retry(
+    reraise=True,
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.5, max=8),
+    retry=retry_if_exception(_transient),
+)
+def _fetch(provider_name: str, provider, symbol: str, start: date, end: date, meta: dict):
+    # slot per attempt, so backoff sleeps don't hold the vendor's concurrency budget
+    with provider_slot(provider_name):
+        return provider.fetch(symbol, start, end, **meta)
+
+
+def _insert_ignore_duplicates():
+    # duplicates hit uq_obs_rf_source_date and are skipped by the database
+    table = Observation.__table__
+    dialect = get_engine().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return table.insert()
+    return insert(table).on_conflict_do_nothing(
+        index_elements=["risk_factor_id", "source_id", "obs_date"]
+    )
+
+def _missing_ranges(
+    min_d: date | None, max_d: date | None, start: date, end: date
+) -> list[tuple[date, date]]:
+    # parts of [start, end] outside the stored [min_d, max_d] coverage; empty when fully covered
+    if min_d is None or max_d is None:
+        return [(start, end)]
+    ranges = []
+    if start < min_d:
+        ranges.append((start, min_d - timedelta(days=1)))
+    if end > max_d:
+        ranges.append((max_d + timedelta(days=1), end))
+    return [(a, b) for a, b in ranges if a <= b]
+
 def ingest_series(
     rf_id: str,
     provider_name: str,
@@ -40,6 +99,7 @@ def ingest_series(
     end: date,
     field: str,
     meta: dict,
+    bulk: bool = True,
 ):
     provider = get_provider(provider_name)
 
@@ -54,68 +114,105 @@ def ingest_series(
             )
         ).one()
 
-        # If already fully covered, don't call vendor again
-        if min_d is not None and max_d is not None and min_d <= start and max_d >= end:
-            return 0
-
-        # Determine missing ranges to fetch
-        ranges: list[tuple[date, date]] = []
-        if min_d is None or max_d is None:
-            ranges.append((start, end))
-        else:
-            if start < min_d:
-                ranges.append((start, min_d - timedelta(days=1)))
-            if end > max_d:
-                ranges.append((max_d + timedelta(days=1), end))
-
-        existing = set(
-            d for (d,) in s.exec(
-                select(Observation.obs_date).where(
-                    Observation.risk_factor_id == rf_id,
-                    Observation.source_id == source_id,
-                )
-            ).all()
-        )
-
+    # only the uncovered parts go to the vendor; nothing at all if fully covered
     inserted = 0
-    for a, b in ranges:
-        if a > b:
-            continue
-        data = provider.fetch(symbol, a, b, **(meta or {}))
+    for a, b in _missing_ranges(min_d, max_d, start, end):
+        data = _fetch(provider_name, provider, symbol, a, b, meta or {})
         df = data.df
         if "value" not in df.columns:
             raise ValueError(f"{provider_name} did not return 'value' column")
 
+        # providers return a DatetimeIndex; the store keys on plain dates
+        idx = pd.DatetimeIndex(pd.to_datetime(df.index))
+        keep = (idx >= pd.Timestamp(start)) & (idx <= pd.Timestamp(end))
+        batch = [
+            {"risk_factor_id": rf_id, "source_id": source_id, "obs_date": d, "value": float(v)}
+            for d, v in zip(idx[keep].date, df["value"].to_numpy()[keep])
+        ]
+        if not batch:
+            continue
+
+        # INSERT ... ON CONFLICT DO NOTHING: uq_obs_rf_source_date drops already-stored dates,
+        # rowcount counts only the new ones. bulk=False sends one row per statement.
+        stmt = _insert_ignore_duplicates()
+        step = INSERT_BATCH if bulk else 1
         with session() as s:
-            batch = []
-            for d, v in df["value"].items():
-                if d < start or d > end:
-                    continue
-                if d in existing:
-                    continue
-                batch.append(Observation(risk_factor_id=rf_id, source_id=source_id, obs_date=d, value=float(v)))
-
-            if not batch:
-                continue
-
-            s.add_all(batch)
             try:
+                n = 0
+                for i in range(0, len(batch), step):
+                    n += max(s.execute(stmt, batch[i : i + step]).rowcount, 0)
                 s.commit()
-                inserted += len(batch)
+                inserted += n
             except IntegrityError:
                 s.rollback()
 
+    if inserted:
+        clear_series_cache()
+
     return inserted
 
-def ingest_risk_factor(rf: RiskFactorSpec, start: date, end: date) -> dict:
+def prefetch_batched(rfs: list[RiskFactorSpec], start: date, end: date) -> None:
+    """
+    Warm providers that batch symbols (yfinance) so per-source fetches are served from one download.
+    Only the ranges ingest_series would actually fetch are downloaded: covered series are skipped.
+    """
+    wanted = [(rf.id, src) for rf in rfs for src in rf.sources if src.name == "yfinance"]
+    if not wanted:
+        return
+
+    with session() as s:
+        coverage = {
+            (rf_id, symbol, field): (min_d, max_d)
+            for rf_id, symbol, field, min_d, max_d in s.exec(
+                select(
+                    Observation.risk_factor_id,
+                    DataSource.symbol,
+                    DataSource.field,
+                    func.min(Observation.obs_date),
+                    func.max(Observation.obs_date),
+                )
+                .join(DataSource, Observation.source_id == DataSource.id)
+                .where(DataSource.name == "yfinance")
+                .group_by(Observation.risk_factor_id, DataSource.symbol, DataSource.field)
+            ).all()
+        }
+
+    ranges: dict[str, set[tuple[date, date]]] = {}
+    for rf_id, src in wanted:
+        min_d, max_d = coverage.get((rf_id, src.symbol, src.field), (None, None))
+        ranges.setdefault(src.symbol, set()).update(_missing_ranges(min_d, max_d, start, end))
+
+    # one batched download per distinct range; a symbol needing two ranges (backfill + top-up)
+    # is left to its per-source fetches since the prefetch keeps one window per symbol
+    by_range: dict[tuple[date, date], list[str]] = {}
+    for symbol, rs in ranges.items():
+        if len(rs) == 1:
+            by_range.setdefault(next(iter(rs)), []).append(symbol)
+
+    provider = get_provider("yfinance")
+    for (a, b), symbols in by_range.items():
+        try:
+            provider.prefetch(sorted(symbols), a, b)
+        except ProviderError:
+            pass  # per-source fetches retry and report the failure against each risk factor
+
+def ingest_risk_factor(rf: RiskFactorSpec, start: date, end: date, bulk: bool = True) -> dict:
     upsert_risk_factor(rf)
-    results = []
-    for src in rf.sources:
+
+    def one(src) -> dict:
         meta = src.meta or {}
         try:
-            inserted = ingest_series(rf.id, src.name, src.symbol, start, end, field=src.field, meta=meta)
-            results.append({"source": src.name, "symbol": src.symbol, "inserted": inserted, "error": ""})
+            inserted = ingest_series(
+                rf.id, src.name, src.symbol, start, end, field=src.field, meta=meta, bulk=bulk
+            )
+            return {"source": src.name, "symbol": src.symbol, "inserted": inserted, "error": ""}
         except Exception as e:
             # critical for DQ platforms: never die because one feed is broken
-            results.append({"source": src.name, "symbol": src.symbol, "inserted": 0, "error": str(e)})
+            return {"source": src.name, "symbol": src.symbol, "inserted": 0, "error": str(e)}
+
+    if len(rf.sources) <= 1:
+        return {"risk_factor": rf.id, "results": [one(src) for src in rf.sources]}
+    # each source is its own HTTP fetch + session: overlap them; map() keeps config order
+    with ThreadPoolExecutor(max_workers=len(rf.sources)) as ex:
+        results = list(ex.map(one, rf.sources))
     return {"risk_factor": rf.id, "results": results}
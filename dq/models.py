@@ -2,7 +2,7 @@ from __future__ import annotations
 from datetime import datetime, date
 from typing import Optional
 from sqlmodel import SQLModel, Field, Column, JSON
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint, text
 
 class RiskFactor(SQLModel, table=True):
     id: str = Field(primary_key=True)
@@ -20,6 +20,7 @@ class DataSource(SQLModel, table=True):
 class Observation(SQLModel, table=True):
     __table_args__ = (
         UniqueConstraint("risk_factor_id", "source_id", "obs_date", name="uq_obs_rf_source_date"),
+        Index("ix_obs_rf_date", "risk_factor_id", "obs_date"),
     )
 
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -38,7 +39,22 @@ class DQRun(SQLModel, table=True):
     finished_at: Optional[datetime] = Field(default=None, index=True)
     parameters: dict = Field(default_factory=dict, sa_column=Column(JSON))
 
+class DQRunCache(SQLModel, table=True):
+    # last successful run per (risk factor, asof, lookback) + fingerprint of the observations it saw
+    risk_factor_id: str = Field(primary_key=True)
+    asof: date = Field(primary_key=True)
+    lookback_days: int = Field(primary_key=True)
+    fingerprint: str
+    dq_run_id: int = Field(foreign_key="dqrun.id")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 class DQException(SQLModel, table=True):
+    __table_args__ = (
+        # window filters (obs_date range + status / risk factor) and the severity-ordered pack read
+        Index("ix_dqexc_date_status", "obs_date", "status", "risk_factor_id"),
+        Index("ix_dqexc_sev_date", text("severity DESC"), text("obs_date DESC")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     dq_run_id: int = Field(foreign_key="dqrun.id", index=True)
     risk_factor_id: str = Field(index=True)
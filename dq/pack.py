@@ -1,17 +1,16 @@
 from __future__ import annotations
 from datetime import date, datetime
 from pathlib import Path
-import pandas as pd
-from jinja2 import Template
+from jinja2 import Environment
 from sqlmodel import select
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
 from reportlab.lib.styles import getSampleStyleSheet
 from .settings import settings
-from .db import session
+from .db import read_frame
 from .models import DQException
 
-HTML = Template("""
+HTML = Environment(enable_async=False).from_string("""
 <!doctype html><html><head><meta charset="utf-8"><title>DQ Pack</title>
 <style>
 body{font-family:Arial;margin:24px} table{border-collapse:collapse;width:100%}
@@ -38,17 +37,21 @@ def make_pack(from_date: date, to_date: date) -> dict:
     html_path = out_dir / f"dq_pack_{from_date}_{to_date}_{stamp}.html"
     pdf_path = out_dir / f"dq_pack_{from_date}_{to_date}_{stamp}.pdf"
 
-    with session() as s:
-        rows = s.exec(
-            select(DQException).where(DQException.obs_date >= from_date, DQException.obs_date <= to_date)
-        ).all()
-
-    df = pd.DataFrame([r.model_dump() for r in rows]) if rows else pd.DataFrame()
+    # straight from the cursor into pandas: no ORM instances / model_dump per row
+    df = read_frame(
+        select(DQException.__table__).where(
+            DQException.obs_date >= from_date, DQException.obs_date <= to_date
+        )
+    )
+    rows = df.to_dict(orient="records")
     total = 0 if df.empty else len(df)
     high = 0 if df.empty else int((df["severity"] >= 80).sum())
     open_ = 0 if df.empty else int((df["status"] == "open").sum())
 
-    html_path.write_text(HTML.render(f=str(from_date), t=str(to_date), total=total, high=high, open_=open_, rows=rows), encoding="utf-8")
+    # write the report to disk chunk by chunk instead of rendering one big string first
+    HTML.stream(
+        f=str(from_date), t=str(to_date), total=total, high=high, open_=open_, rows=rows
+    ).dump(str(html_path), encoding="utf-8")
 
     styles = getSampleStyleSheet()
     doc = SimpleDocTemplate(str(pdf_path), pagesize=A4)
@@ -60,9 +63,18 @@ def make_pack(from_date: date, to_date: date) -> dict:
         Spacer(1, 12),
     ]
     if rows:
-        top = sorted(rows, key=lambda x: (-x.severity, x.obs_date))[:50]
+        # nlargest keeps every tie at the cut-off, then the small remainder is ordered by date
+        top = (
+            df.nlargest(50, "severity", keep="all")
+            .sort_values(["severity", "obs_date"], ascending=[False, True], kind="stable")
+            .head(50)
+        )
         table_data = [["Date","RF","Rule","Sev","Status","Suggested"]] + [
-            [str(r.obs_date), r.risk_factor_id, r.rule, str(r.severity), r.status, r.suggested_action] for r in top
+            [
+                str(r.obs_date), r.risk_factor_id, r.rule, str(r.severity), r.status,
+                r.suggested_action,
+            ]
+            for r in top.itertuples(index=False)
         ]
         story.append(Table(table_data, hAlign="LEFT"))
     else:
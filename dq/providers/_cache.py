@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from ..settings import settings
+from .base import Provider, SeriesData
+
+
+def _key(provider: str, symbol: str, start: date, end: date, kwargs: dict[str, Any]) -> str:
+    raw = "|".join(
+        [provider, symbol, start.isoformat(), end.isoformat(), repr(sorted(kwargs.items()))]
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CachedProvider(Provider):
+    """
+    Disk memo of provider.fetch keyed by (provider, symbol, start, end, kwargs).
+    Dashboard reloads and re-ingests of the same window skip HTTP + parsing; entries expire after
+    ttl seconds and are deleted by a sweep (at most once per ttl) so moving windows don't pile up
+    files.
+    """
+
+    def __init__(self, inner: Provider, ttl: float | None = None):
+        self.inner = inner
+        self.name = inner.name
+        self.ttl = settings.fetch_cache_ttl if ttl is None else ttl
+        self._last_prune: float | None = None
+        self._prune_lock = threading.Lock()
+
+    def __getattr__(self, attr: str):
+        # fetch_many / prefetch etc. on the wrapped provider
+        return getattr(self.inner, attr)
+
+    def _dir(self) -> Path:
+        return Path(settings.outputs_dir) / "fetch_cache" / self.name
+
+    def _path(self, key: str) -> Path:
+        return self._dir() / f"{key}.pkl"
+
+    def _prune(self) -> None:
+        with self._prune_lock:
+            now = time.monotonic()
+            if self._last_prune is not None and now - self._last_prune < self.ttl:
+                return
+            self._last_prune = now
+        cutoff = time.time() - self.ttl
+        for path in self._dir().glob("*.pkl"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass  # raced with another writer / sweeper
+
+    def fetch(self, symbol: str, start: date, end: date, **kwargs) -> SeriesData:
+        if self.ttl <= 0:
+            return self.inner.fetch(symbol, start, end, **kwargs)
+
+        path = self._path(_key(self.name, symbol, start, end, kwargs))
+        try:
+            if time.time() - path.stat().st_mtime < self.ttl:
+                return SeriesData(df=pd.read_pickle(path), provider=self.name, symbol=symbol)
+        except Exception:
+            pass  # missing / unreadable entry: fetch again
+
+        data = self.inner.fetch(symbol, start, end, **kwargs)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        data.df.to_pickle(tmp)
+        os.replace(tmp, path)  # atomic: concurrent readers never see a partial file
+        self._prune()
+        return data
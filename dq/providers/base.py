@@ -2,6 +2,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 
 @dataclass(frozen=True)
 class SeriesData:
@@ -16,3 +18,19 @@ class Provider:
     name: str
     def fetch(self, symbol: str, start: date, end: date, **kwargs) -> SeriesData:
         raise NotImplementedError
+
+def make_session(pool: int = 16) -> requests.Session:
+    """
+    Keep-alive session with a connection pool. No transport-level retries: transient failures are
+    retried once, at a single layer (ingest._fetch, or TwelveDataProvider._call), so backoffs don't
+    compound.
+    """
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=0)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers["Accept-Encoding"] = "gzip, deflate"
+    return s
+
+# shared by providers: one TLS handshake per host instead of one per fetch
+SESSION = make_session()
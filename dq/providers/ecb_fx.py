@@ -1,45 +1,78 @@
 from __future__ import annotations
+import threading
+import time
 from datetime import date
+import numpy as np
 import pandas as pd
-import requests
 import xml.etree.ElementTree as ET
-from .base import Provider, SeriesData, ProviderError
+from .base import SESSION, Provider, SeriesData, ProviderError
 
 ECB_HIST_XML = "https://www.ecb.europa.eu/stats/eurofxref/eurofxref-hist.xml"
 
+# the history file is refreshed once a day (~16:00 CET); parse it once, then slice per currency
+_TABLE_TTL = 6 * 3600.0
+_TABLE_LOCK = threading.Lock()
+_table: tuple[float, dict[str, tuple[np.ndarray, np.ndarray]]] | None = None
+
+
+def _download_table() -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    try:
+        r = SESSION.get(ECB_HIST_XML, stream=True, timeout=30)
+        r.raise_for_status()
+    except Exception as e:
+        raise ProviderError(f"ECB download failed: {e}") from e
+
+    # stream the (multi-MB) history: read each daily Cube as it closes, then free it
+    r.raw.decode_content = True
+    days: dict[str, list[str]] = {}
+    rates: dict[str, list[float]] = {}
+    try:
+        for _, node in ET.iterparse(r.raw, events=("end",)):
+            if node.tag.rpartition("}")[2] == "Cube" and "time" in node.attrib:
+                d = node.attrib["time"]
+                for child in node:
+                    ccy = child.attrib.get("currency")
+                    if ccy is not None:
+                        days.setdefault(ccy, []).append(d)
+                        rates.setdefault(ccy, []).append(float(child.attrib["rate"]))
+                node.clear()
+    except ET.ParseError as e:
+        raise ProviderError(f"ECB XML parse failed: {e}") from e
+    finally:
+        r.close()
+
+    table = {}
+    for ccy, ds in days.items():
+        dates = np.array(ds, dtype="datetime64[D]")
+        vals = np.array(rates[ccy], dtype=np.float64)
+        if dates[0] > dates[-1]:  # the history file is published newest-first
+            dates, vals = dates[::-1], vals[::-1]
+        table[ccy] = (dates, vals)
+    return table
+
+
+def _ecb_table() -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """{currency: (ascending datetime64[D] dates, EUR rates)}, downloaded at most once per TTL."""
+    global _table
+    # held across the download so concurrent ingests of several EUR legs share one fetch
+    with _TABLE_LOCK:
+        if _table is None or time.monotonic() - _table[0] > _TABLE_TTL:
+            _table = (time.monotonic(), _download_table())
+        return _table[1]
+
+
 class ECBFXProvider(Provider):
     name = "ecb_fx"
 
     def fetch(self, symbol: str, start: date, end: date, **kwargs) -> SeriesData:
-        try:
-            r = requests.get(ECB_HIST_XML, timeout=30)
-            r.raise_for_status()
-        except Exception as e:
-            raise ProviderError(f"ECB download failed: {e}") from e
-
-        try:
-            root = ET.fromstring(r.text)
-        except Exception as e:
-            raise ProviderError(f"ECB XML parse failed: {e}") from e
-
-        records = []
-        for node in root.iter():
-            if node.tag.endswith("Cube") and "time" in node.attrib:
-                d = pd.to_datetime(node.attrib["time"]).date()
-                rate = None
-                for child in list(node):
-                    if child.tag.endswith("Cube") and child.attrib.get("currency") == symbol:
-                        rate = float(child.attrib["rate"])
-                        break
-                if rate is not None:
-                    records.append((d, rate))
-
-        if not records:
+        table = _ecb_table()
+        if symbol not in table:
             raise ProviderError(f"ECB FX no data for {symbol}")
 
-        s = pd.Series({d: v for d, v in records}, name="value").sort_index()
-        df = s.to_frame()
-        df = df.loc[(df.index >= start) & (df.index <= end)]
+        dates, vals = table[symbol]
+        lo = np.searchsorted(dates, np.datetime64(start), side="left")
+        hi = np.searchsorted(dates, np.datetime64(end), side="right")
+        df = pd.DataFrame({"value": vals[lo:hi]}, index=pd.DatetimeIndex(dates[lo:hi]))
         if df.empty:
             raise ProviderError(f"ECB FX empty after filtering for {symbol}")
         return SeriesData(df=df, provider=self.name, symbol=symbol)
@@ -4,9 +4,8 @@ from datetime import date
 from io import StringIO
 
 import pandas as pd
-import requests
 
-from .base import Provider, SeriesData, ProviderError
+from .base import SESSION, Provider, SeriesData, ProviderError
 
 # Keyless CSV endpoint
 # Example: https://fred.stlouisfed.org/graph/fredgraph.csv?id=DGS10
@@ -18,7 +17,7 @@ class FREDProvider(Provider):
 
     def fetch(self, symbol: str, start: date, end: date, **kwargs) -> SeriesData:
         try:
-            r = requests.get(FRED_CSV, params={"id": symbol}, timeout=30)
+            r = SESSION.get(FRED_CSV, params={"id": symbol}, timeout=30)
             r.raise_for_status()
         except Exception as e:
             raise ProviderError(f"FRED download failed for {symbol}: {e}") from e
@@ -31,12 +30,12 @@ class FREDProvider(Provider):
         if df.empty or "DATE" not in df.columns or symbol not in df.columns:
             raise ProviderError(f"FRED returned unexpected CSV for {symbol}: cols={list(df.columns)}")
 
-        df["DATE"] = pd.to_datetime(df["DATE"]).dt.date
+        df["DATE"] = pd.to_datetime(df["DATE"])
         # FRED uses '.' for missing
         s = pd.to_numeric(df[symbol].replace(".", pd.NA), errors="coerce")
-        out = pd.DataFrame({"value": s.values}, index=df["DATE"]).dropna()
+        out = pd.DataFrame({"value": s.values}, index=pd.DatetimeIndex(df["DATE"])).dropna()
 
-        out = out.loc[(out.index >= start) & (out.index <= end)]
+        out = out.loc[(out.index >= pd.Timestamp(start)) & (out.index <= pd.Timestamp(end))]
         if out.empty:
             raise ProviderError(f"FRED empty after filtering for {symbol}")
 
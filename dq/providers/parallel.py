@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+# concurrent requests per vendor: yfinance / twelvedata throttle hard (429), the rest take more
+PROVIDER_LIMITS = {
+    "yfinance": 4,
+    "twelvedata": 2,
+    "stooq": 8,
+    "ecb_fx": 8,
+    "ecb_fx_cross": 8,
+}
+DEFAULT_LIMIT = 8
+
+_SLOTS: dict[str, threading.BoundedSemaphore] = {}
+_SLOTS_LOCK = threading.Lock()
+
+
+@contextmanager
+def provider_slot(name: str) -> Iterator[None]:
+    """Hold one of the provider's concurrency slots (shared by every thread in the process)."""
+    with _SLOTS_LOCK:
+        sem = _SLOTS.get(name)
+        if sem is None:
+            limit = PROVIDER_LIMITS.get(name, DEFAULT_LIMIT)
+            sem = _SLOTS[name] = threading.BoundedSemaphore(limit)
+    with sem:
+        yield
@@ -1,19 +1,33 @@
-from .fred import FREDProvider
-from .stooq import StooqProvider
-from .yfinance_provider import YFinanceProvider
-from .ecb_fx import ECBFXProvider, ECBFXCrossProvider
-from .twelvedata import TwelveDataProvider
+import threading
+from importlib import import_module
 
-PROVIDERS = {
-    "fred": FREDProvider(),
-    "stooq": StooqProvider(),
-    "yfinance": YFinanceProvider(),
-    "ecb_fx": ECBFXProvider(),
-    "ecb_fx_cross": ECBFXCrossProvider(),
-    "twelvedata": TwelveDataProvider(),
+# name -> (module, class, disk-cached); imported and built on first use
+# so yfinance & co. load only when needed
+_FACTORIES = {
+    "fred": ("fred", "FREDProvider", False),
+    # stooq revalidates its own history cache (ETag / Last-Modified)
+    "stooq": ("stooq", "StooqProvider", False),
+    "yfinance": ("yfinance_provider", "YFinanceProvider", True),
+    "ecb_fx": ("ecb_fx", "ECBFXProvider", False),
+    "ecb_fx_cross": ("ecb_fx", "ECBFXCrossProvider", False),
+    "twelvedata": ("twelvedata", "TwelveDataProvider", True),
 }
+_INSTANCES: dict = {}
+_LOCK = threading.Lock()
 
 def get_provider(name: str):
-    if name not in PROVIDERS:
-        raise KeyError(f"Unknown provider {name}. Available: {sorted(PROVIDERS)}")
-    return PROVIDERS[name]
+    inst = _INSTANCES.get(name)
+    if inst is not None:
+        return inst
+    if name not in _FACTORIES:
+        raise KeyError(f"Unknown provider {name}. Available: {sorted(_FACTORIES)}")
+    with _LOCK:  # threaded ingestion: build each provider once
+        inst = _INSTANCES.get(name)
+        if inst is None:
+            module, cls, cached = _FACTORIES[name]
+            inst = getattr(import_module(f".{module}", __package__), cls)()
+            if cached:
+                from ._cache import CachedProvider
+                inst = CachedProvider(inst)
+            _INSTANCES[name] = inst
+    return inst
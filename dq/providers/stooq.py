@@ -1,44 +1,101 @@
 from __future__ import annotations
 
 from datetime import date
-from io import StringIO
+import hashlib
+from io import BytesIO
+import os
+from pathlib import Path
+import threading
 
 import pandas as pd
-import requests
 
-from .base import Provider, SeriesData, ProviderError
+from ..settings import settings
+from .base import Provider, SeriesData, ProviderError, make_session
 
 # Keyless CSV endpoint (full history), filter locally
 # Example: https://stooq.com/q/d/l/?s=10yusy.b&i=d
 STOOQ_CSV = "https://stooq.com/q/d/l/"
+# pooled keep-alive connections
+_SESSION = make_session(pool=32)
+
+
+def _history_path(symbol: str) -> Path:
+    key = hashlib.sha1(symbol.encode("utf-8")).hexdigest()
+    return Path(settings.outputs_dir) / "stooq_cache" / f"{key}.pkl"
+
+
+def _load_history(symbol: str) -> dict | None:
+    # {"etag", "last_modified", "df"} from the last 200 response for this symbol
+    try:
+        return pd.read_pickle(_history_path(symbol))
+    except Exception:
+        return None
+
+
+def _store_history(
+    symbol: str, etag: str | None, last_modified: str | None, df: pd.DataFrame
+) -> None:
+    path = _history_path(symbol)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    pd.to_pickle({"etag": etag, "last_modified": last_modified, "df": df}, tmp)
+    os.replace(tmp, path)
+
+
+def _parse(content: bytes, symbol: str) -> pd.DataFrame:
+    try:
+        # parse the raw bytes (no text decode + StringIO copy) and only the columns we use
+        df = pd.read_csv(BytesIO(content), usecols=lambda c: c in ("Date", "Close"))
+    except Exception as e:
+        raise ProviderError(f"Stooq CSV parse failed for {symbol}: {e}") from e
+
+    if df.empty or "Date" not in df.columns:
+        raise ProviderError(
+            f"Stooq returned empty/unexpected CSV for {symbol}: cols={list(df.columns)}"
+        )
+
+    if "Close" not in df.columns:
+        raise ProviderError(f"Stooq missing Close for {symbol}: cols={list(df.columns)}")
+
+    df["Date"] = pd.to_datetime(df["Date"])
+    out = df[["Date", "Close"]].rename(columns={"Close": "value"}).dropna()
+    return out.set_index("Date").sort_index()
 
 
 class StooqProvider(Provider):
     name = "stooq"
 
     def fetch(self, symbol: str, start: date, end: date, **kwargs) -> SeriesData:
-        try:
-            r = requests.get(STOOQ_CSV, params={"s": symbol, "i": "d"}, timeout=30)
-            r.raise_for_status()
-        except Exception as e:
-            raise ProviderError(f"Stooq download failed for {symbol}: {e}") from e
+        # the CSV is the full history: revalidate the last copy (ETag / Last-Modified) so an
+        # unchanged file comes back as an empty 304 instead of being downloaded and parsed again
+        cached = _load_history(symbol)
+        headers = {}
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
 
         try:
-            df = pd.read_csv(StringIO(r.text))
+            r = _SESSION.get(STOOQ_CSV, params={"s": symbol, "i": "d"}, headers=headers, timeout=30)
+            if r.status_code != 304 or cached is None:
+                r.raise_for_status()
         except Exception as e:
-            raise ProviderError(f"Stooq CSV parse failed for {symbol}: {e}") from e
-
-        if df.empty or "Date" not in df.columns:
-            raise ProviderError(f"Stooq returned empty/unexpected CSV for {symbol}: cols={list(df.columns)}")
-
-        if "Close" not in df.columns:
-            raise ProviderError(f"Stooq missing Close for {symbol}: cols={list(df.columns)}")
+            raise ProviderError(f"Stooq download failed for {symbol}: {e}") from e
 
-        df["Date"] = pd.to_datetime(df["Date"]).dt.date
-        out = df[["Date", "Close"]].rename(columns={"Close": "value"}).dropna()
-        out = out.set_index("Date").sort_index()
+        if r.status_code == 304 and cached is not None:
+            out = cached["df"]
+        else:
+            out = _parse(r.content, symbol)
+            etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+            if etag or last_modified:
+                try:
+                    _store_history(symbol, etag, last_modified, out)
+                except OSError:
+                    pass  # cache is best effort
 
-        out = out.loc[(out.index >= start) & (out.index <= end)]
+        # history is date-sorted, so the window is a binary-searched label slice
+        out = out.loc[pd.Timestamp(start) : pd.Timestamp(end)]
         if out.empty:
             raise ProviderError(f"Stooq empty after filtering for {symbol}")
 
@@ -4,13 +4,17 @@ from datetime import date
 import os
 from typing import Any
 
+import numpy as np
+import orjson
 import pandas as pd
 import requests
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
-from .base import Provider, ProviderError, SeriesData
+from .base import Provider, ProviderError, SeriesData, make_session
 
 TD_URL = "https://api.twelvedata.com/time_series"
+# pooled keep-alive connections
+_SESSION = make_session(pool=32)
 
 
 def _get_td_key() -> str | None:
@@ -43,7 +47,7 @@ class TwelveDataProvider(Provider):
     )
     def _call(self, params: dict[str, Any]) -> dict[str, Any]:
         try:
-            response = requests.get(TD_URL, params=params, timeout=25)
+            response = _SESSION.get(TD_URL, params=params, timeout=25)
         except (requests.Timeout, requests.ConnectionError):
             raise
 
@@ -51,7 +55,7 @@ class TwelveDataProvider(Provider):
             raise ProviderError(f"Twelve Data temporary error HTTP {response.status_code}")
 
         try:
-            payload = response.json()
+            payload = orjson.loads(response.content)
         except Exception as exc:
             raise ProviderError(f"Twelve Data returned non-JSON: {exc}")
 
@@ -88,27 +92,29 @@ class TwelveDataProvider(Provider):
                 f"Twelve Data empty/invalid response for {symbol}: keys={list(payload.keys())}"
             )
 
-        df = pd.DataFrame(values)
-        if "datetime" not in df.columns or "close" not in df.columns:
+        if not any("datetime" in v and "close" in v for v in values):
             raise ProviderError(
-                f"Twelve Data response missing datetime/close for {symbol}: cols={list(df.columns)}"
+                "Twelve Data response missing datetime/close for "
+                f"{symbol}: cols={sorted(values[0])}"
             )
 
-        df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
-        df = df.dropna(subset=["datetime"])
-
-        df["value"] = pd.to_numeric(df["close"], errors="coerce")
-        df = df.dropna(subset=["value"])
-
-        df["date"] = df["datetime"].dt.date
-        out = (
-            df[["date", "value"]]
-            .drop_duplicates("date", keep="last")
-            .set_index("date")
-            .sort_index()
+        # two flat arrays straight from the row dicts instead of a DataFrame of every field
+        dts = pd.to_datetime(
+            np.array([v.get("datetime") for v in values], dtype=object),
+            errors="coerce",
+            format="ISO8601",
         )
+        close = pd.to_numeric(
+            np.array([v.get("close") for v in values], dtype=object), errors="coerce"
+        )
+        close = np.asarray(close, dtype=np.float64)
+        keep = ~dts.isna() & ~np.isnan(close)
+
+        # one sorted groupby pass: dedup (last row per date wins) + sort
+        s = pd.Series(close[keep], index=dts[keep].normalize())
+        out = s.groupby(level=0, sort=True).last().to_frame("value")
 
-        out = out.loc[(out.index >= start) & (out.index <= end)]
+        out = out.loc[pd.Timestamp(start) : pd.Timestamp(end)]
         if out.empty:
             raise ProviderError(f"Twelve Data returned no rows after filtering for {symbol}")
 
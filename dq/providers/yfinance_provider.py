@@ -1,29 +1,95 @@
 from __future__ import annotations
 from datetime import date
+import threading
 import time
 import pandas as pd
 import yfinance as yf
 from .base import Provider, SeriesData, ProviderError
 
+BATCH_SIZE = 20  # Yahoo serves up to ~20 tickers per chart request
+PREFETCH_TTL = 600.0
+
+
+def _download(tickers: list[str], start: date, end: date) -> pd.DataFrame:
+    label = " ".join(tickers)
+    for attempt in range(4):
+        try:
+            return yf.download(
+                tickers,
+                start=str(start),
+                end=str(end),
+                progress=False,
+                auto_adjust=False,
+                group_by="ticker",
+                threads=True,
+            )
+        except Exception as e:
+            msg = str(e)
+            if "Too Many Requests" in msg or "Rate limited" in msg or "YFRateLimitError" in msg:
+                time.sleep(1.5 * (2 ** attempt))
+                continue
+            raise ProviderError(f"yfinance fetch failed for {label}: {e}") from e
+    raise ProviderError(f"yfinance rate limited repeatedly for {label}")
+
+
+def _value_frame(df: pd.DataFrame | None, symbol: str) -> pd.DataFrame | None:
+    if df is None or df.empty:
+        return None
+    if isinstance(df.columns, pd.MultiIndex):
+        if symbol not in df.columns.get_level_values(0):
+            return None
+        df = df[symbol]
+    df = df.sort_index()
+    col = "Adj Close" if "Adj Close" in df.columns else "Close"
+    out = df[[col]].rename(columns={col: "value"}).dropna()
+    out.index = pd.DatetimeIndex(pd.to_datetime(out.index)).tz_localize(None).normalize()
+    return out if not out.empty else None
+
+
 class YFinanceProvider(Provider):
     name = "yfinance"
+
+    def __init__(self):
+        # symbol -> (fetched_at, start, end, frame) from prefetch();
+        # served to fetch() for covered ranges
+        self._prefetched: dict[str, tuple[float, date, date, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def fetch_many(self, symbols: list[str], start: date, end: date) -> dict[str, SeriesData]:
+        """One download per BATCH_SIZE tickers; symbols Yahoo returns nothing for are left out."""
+        out: dict[str, SeriesData] = {}
+        for i in range(0, len(symbols), BATCH_SIZE):
+            batch = list(symbols[i : i + BATCH_SIZE])
+            df = _download(batch, start, end)
+            for sym in batch:
+                frame = _value_frame(df, sym)
+                if frame is not None:
+                    out[sym] = SeriesData(df=frame, provider=self.name, symbol=sym)
+        return out
+
+    def prefetch(self, symbols: list[str], start: date, end: date) -> None:
+        """Warm later fetch() calls for these symbols with batched downloads."""
+        got = self.fetch_many(symbols, start, end)
+        now = time.monotonic()
+        with self._lock:
+            for sym, data in got.items():
+                self._prefetched[sym] = (now, start, end, data.df)
+
     def fetch(self, symbol: str, start: date, end: date, **kwargs) -> SeriesData:
-        for attempt in range(4):
-            try:
-                df = yf.download(symbol, start=str(start), end=str(end), progress=False, auto_adjust=False)
-                break
-            except Exception as e:
-                msg = str(e)
-                if "Too Many Requests" in msg or "Rate limited" in msg or "YFRateLimitError" in msg:
-                    time.sleep(1.5 * (2 ** attempt))
-                    continue
-                raise ProviderError(f"yfinance fetch failed for {symbol}: {e}") from e
-        else:
-            raise ProviderError(f"yfinance rate limited repeatedly for {symbol}")
-        if df is None or df.empty:
+        with self._lock:
+            hit = self._prefetched.get(symbol)
+        if hit is not None:
+            fetched_at, p_start, p_end, frame = hit
+            if time.monotonic() - fetched_at < PREFETCH_TTL and p_start <= start and end <= p_end:
+                # yf.download treats end as exclusive
+                out = frame.loc[
+                    (frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))
+                ]
+                if out.empty:
+                    raise ProviderError(f"yfinance returned empty for {symbol}")
+                return SeriesData(df=out, provider=self.name, symbol=symbol)
+
+        got = self.fetch_many([symbol], start, end)
+        if symbol not in got:
             raise ProviderError(f"yfinance returned empty for {symbol}")
-        df = df.sort_index()
-        col = "Adj Close" if "Adj Close" in df.columns else "Close"
-        out = df[[col]].rename(columns={col: "value"}).dropna()
-        out.index = pd.to_datetime(out.index).date
-        return SeriesData(df=out, provider=self.name, symbol=symbol)
+        return got[symbol]
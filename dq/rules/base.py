@@ -2,6 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date
 from typing import Any, Dict, List
+import numpy as np
 import pandas as pd
 
 @dataclass(frozen=True)
@@ -12,6 +13,23 @@ class Issue:
     suggested_action: str
     details: Dict[str, Any]
 
+def sorted_clean(obj):
+    # dropna + sort_index; engine/provider series arrive date-ordered,
+    # so skip the sort (and its copy) then
+    obj = obj.dropna()
+    return obj if obj.index.is_monotonic_increasing else obj.sort_index()
+
+def n_consecutive(mask: pd.Series, n: int) -> pd.Series:
+    # True where mask holds on this row and the n-1 before it;
+    # one cumsum instead of n-1 shifted copies
+    arr = mask.to_numpy(dtype=bool, na_value=False)
+    out = arr.copy()
+    if n > 1:
+        csum = np.concatenate(([0], np.cumsum(arr, dtype=np.int64)))
+        out[: n - 1] = False
+        out[n - 1 :] = (csum[n:] - csum[:-n]) == n
+    return pd.Series(out, index=mask.index)
+
 class Rule:
     name: str
     def run(self, series: pd.Series, **kwargs) -> List[Issue]:
@@ -1,25 +1,30 @@
 from __future__ import annotations
 from typing import List, Set, Optional
 from datetime import date
+import numpy as np
 import pandas as pd
-from .base import Rule, Issue
+from .base import Rule, Issue, sorted_clean
 
 class MissingBdaysRule(Rule):
     name = "gaps.missing_bdays"
 
     def run(self, series: pd.Series, **kwargs) -> List[Issue]:
-        expected: Optional[Set[date]] = kwargs.get("expected_dates")
-        s = series.dropna().sort_index()
+        # a set of dates or a DatetimeIndex (calendars.expected_index)
+        expected: Optional[Set[date] | pd.DatetimeIndex] = kwargs.get("expected_dates")
+        s = series.dropna()
         if s.empty:
             return []
+        observed = pd.DatetimeIndex(pd.to_datetime(s.index))
         if expected is None:
-            expected = set(pd.bdate_range(min(s.index), max(s.index)).date)
-        observed = set(s.index)
-        missing = sorted(d for d in expected if d not in observed)
+            expected = pd.bdate_range(observed.min(), observed.max())
+        elif not isinstance(expected, pd.DatetimeIndex):
+            expected = pd.DatetimeIndex(pd.to_datetime(list(expected)))
+        # sorted int64 set difference instead of hashing date objects
+        missing = expected.difference(observed)
 
         return [
             Issue(self.name, d, 55, "interpolate", {"reason": "missing_expected_date"})
-            for d in missing
+            for d in missing.date
         ]
 
 class StaleRule(Rule):
@@ -30,19 +35,19 @@ class StaleRule(Rule):
         self.atol = atol
 
     def run(self, series: pd.Series, **kwargs) -> List[Issue]:
-        s = series.dropna().sort_index()
+        s = sorted_clean(series)
         if len(s) < self.min_streak + 1:
             return []
-        unchanged = (s.diff().abs() <= self.atol).fillna(False)
+        unchanged = (s.diff().abs() <= self.atol).fillna(False).to_numpy(dtype=bool)
 
-        out: List[Issue] = []
-        streak = 0
-        for d, flag in unchanged.items():
-            if flag:
-                streak += 1
-                if streak >= self.min_streak:
-                    sev = int(min(100, 30 + 12 * streak))
-                    out.append(Issue(self.name, d, sev, "review", {"streak": streak}))
-            else:
-                streak = 0
-        return out
+        # run-length encode the unchanged flags: edges alternate run start / run stop
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], unchanged.view(np.int8), [0]))))
+        idx = s.index
+        return [
+            Issue(
+                self.name, idx[pos], int(min(100, 30 + 12 * (pos - start + 1))), "review",
+                {"streak": pos - start + 1},
+            )
+            for start, stop in zip(edges[0::2].tolist(), edges[1::2].tolist())
+            for pos in range(start + self.min_streak - 1, stop)
+        ]
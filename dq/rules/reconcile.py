@@ -3,7 +3,7 @@ from __future__ import annotations
 import pandas as pd
 import numpy as np
 from typing import List, Optional
-from .base import Rule, Issue
+from .base import Rule, Issue, n_consecutive, sorted_clean
 
 
 class ReconcileRule(Rule):
@@ -36,10 +36,11 @@ class ReconcileRule(Rule):
 
     @staticmethod
     def _dedup(s: pd.Series) -> pd.Series:
-        s = s.dropna().sort_index()
+        s = sorted_clean(s)
         if not s.index.is_unique:
-            # keep last observation per date (typical vendor overwrite behavior)
-            s = s.groupby(level=0).last()
+            # keep last observation per date (typical vendor overwrite behavior); s is sorted,
+            # so a duplicated() mask does it without groupby's hash table
+            s = s[~s.index.duplicated(keep="last")]
         return s
 
     def _returns(self, s: pd.Series) -> pd.Series:
@@ -80,12 +81,10 @@ class ReconcileRule(Rule):
         b = self._dedup(other)
 
         # Align
-        df = pd.DataFrame({"a": a, "b": b}).dropna().sort_index()
+        df = sorted_clean(pd.DataFrame({"a": a, "b": b}))
         if df.empty:
             return []
 
-        out: List[Issue] = []
-
         if mode == "returns":
             ra = self._returns(df["a"])
             rb = self._returns(df["b"])
@@ -97,67 +96,65 @@ class ReconcileRule(Rule):
             breach = rdiff > ret_tol
             if consecutive > 1:
                 # require N consecutive True; flag the last day of the streak
-                streak = breach.copy()
-                for _ in range(consecutive - 1):
-                    streak = streak & streak.shift(1).fillna(False)
-                breach = streak
+                breach = n_consecutive(breach, consecutive)
 
             rule_name = "reconcile.returns_diff"
 
-            for d in breach[breach].index:
-                dv = float(rdiff.loc[d])
-                sev = int(min(100, 70 + 30 * min(1.0, dv / (5 * ret_tol))))
-                out.append(
-                    Issue(
-                        rule_name,
-                        d,
-                        sev,
-                        "source_switch",
-                        {
-                            "mode": "returns",
-                            "ret_diff": dv,
-                            "ret_tol": float(ret_tol),
-                            "a_ret": float(ra.loc[d]) if d in ra.index and pd.notna(ra.loc[d]) else None,
-                            "b_ret": float(rb.loc[d]) if d in rb.index and pd.notna(rb.loc[d]) else None,
-                            "consecutive": consecutive,
-                            "source_a": src_a,
-                            "source_b": src_b,
-                        },
-                    )
-                )
-
-            return out
-
-        # mode == "level" (current behavior, but dedup-safe)
-        abs_diff = (df["a"] - df["b"]).abs()
-        pct_diff = abs_diff / df["a"].abs().replace(0.0, pd.NA)
-
-        breach = (abs_diff > self.abs_tol) & (pct_diff > self.pct_tol)
-        if self.consecutive > 1:
-            streak = breach.copy()
-            for _ in range(self.consecutive - 1):
-                streak = streak & streak.shift(1).fillna(False)
-            breach = streak
-
-        for d in breach[breach].index:
-            ad = float(abs_diff.loc[d])
-            pdiff = float(pct_diff.loc[d]) if pd.notna(pct_diff.loc[d]) else ad
-            sev = int(min(100, 70 + 30 * min(1.0, pdiff / (5 * self.pct_tol))))
-            out.append(
+            m = breach.to_numpy(dtype=bool)
+            diffs = rdiff.to_numpy()[m]
+            a_r = ra.reindex(rdiff.index).to_numpy()[m]
+            b_r = rb.reindex(rdiff.index).to_numpy()[m]
+            sevs = np.minimum(100, 70 + 30 * np.minimum(1.0, diffs / (5 * ret_tol))).astype(int)
+            return [
                 Issue(
-                    self.name,
+                    rule_name,
                     d,
                     sev,
                     "source_switch",
                     {
-                        "mode": "level",
-                        "abs_diff": ad,
-                        "pct_diff": pdiff,
-                        "abs_tol": float(self.abs_tol),
-                        "pct_tol": float(self.pct_tol),
-                        "consecutive": self.consecutive,
+                        "mode": "returns",
+                        "ret_diff": dv,
+                        "ret_tol": float(ret_tol),
+                        "a_ret": None if np.isnan(ar) else ar,
+                        "b_ret": None if np.isnan(br) else br,
+                        "consecutive": consecutive,
+                        "source_a": src_a,
+                        "source_b": src_b,
                     },
                 )
-            )
+                for d, sev, dv, ar, br in zip(
+                    rdiff.index[m], sevs.tolist(), diffs.tolist(), a_r.tolist(), b_r.tolist()
+                )
+            ]
+
+        # mode == "level" (current behavior, but dedup-safe)
+        abs_diff = (df["a"] - df["b"]).abs()
+        # NaN (not pd.NA) for a zero base keeps pct_diff float64; NaN compares False below
+        pct_diff = abs_diff / df["a"].abs().replace(0.0, np.nan)
 
-        return out
+        breach = (abs_diff > self.abs_tol) & (pct_diff > self.pct_tol)
+        if self.consecutive > 1:
+            breach = n_consecutive(breach, self.consecutive)
+
+        m = breach.to_numpy(dtype=bool)
+        ads = abs_diff.to_numpy()[m]
+        pcts = pct_diff.to_numpy()[m]
+        pdiffs = np.where(np.isnan(pcts), ads, pcts)
+        sevs = np.minimum(100, 70 + 30 * np.minimum(1.0, pdiffs / (5 * self.pct_tol))).astype(int)
+        return [
+            Issue(
+                self.name,
+                d,
+                sev,
+                "source_switch",
+                {
+                    "mode": "level",
+                    "abs_diff": ad,
+                    "pct_diff": pdiff,
+                    "abs_tol": float(self.abs_tol),
+                    "pct_tol": float(self.pct_tol),
+                    "consecutive": self.consecutive,
+                },
+            )
+            for d, sev, ad, pdiff in zip(df.index[m], sevs.tolist(), ads.tolist(), pdiffs.tolist())
+        ]
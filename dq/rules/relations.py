@@ -1,7 +1,8 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 from typing import List
-from .base import Rule, Issue
+from .base import Rule, Issue, n_consecutive, sorted_clean
 
 class CorrBreakRule(Rule):
     name = "relations.corr_break"
@@ -13,16 +14,32 @@ class CorrBreakRule(Rule):
         peer: pd.Series = kwargs.get("peer_series")
         if peer is None:
             return []
-        df = pd.DataFrame({"x": series, "y": peer}).dropna().sort_index()
+        df = sorted_clean(pd.DataFrame({"x": series, "y": peer}))
         if len(df) < self.window + 10:
             return []
         corr = df["x"].rolling(self.window).corr(df["y"])
-        out: List[Issue] = []
-        for d, c in corr.dropna().items():
-            if abs(c) < self.min_abs_corr:
-                sev = int(min(100, 70 + 50 * (self.min_abs_corr - abs(c)) / max(1e-6, self.min_abs_corr)))
-                out.append(Issue(self.name, d, sev, "review", {"rolling_corr": float(c), "window": self.window}))
-        return out
+        c = corr.to_numpy()
+        mask = np.abs(c) < self.min_abs_corr  # NaN compares False
+        c = c[mask]
+        gap = (self.min_abs_corr - np.abs(c)) / max(1e-6, self.min_abs_corr)
+        sev = np.minimum(100, 70 + 50 * gap).astype(int)
+        return [
+            Issue(self.name, d, s, "review", {"rolling_corr": v, "window": self.window})
+            for d, s, v in zip(corr.index[mask], sev.tolist(), c.tolist())
+        ]
+
+def _dedup(s: pd.Series) -> pd.Series:
+    s = sorted_clean(s)
+    if not s.index.is_unique:
+        s = s[~s.index.duplicated(keep="last")]
+    return s
+
+def _align_triangle(ab: pd.Series, bc: pd.Series, ac: pd.Series) -> pd.DataFrame:
+    # deduped legs on their common dates plus the implied cross and its gap
+    df = sorted_clean(pd.DataFrame({"ab": _dedup(ab), "bc": _dedup(bc), "ac": _dedup(ac)}))
+    df["implied"] = df["ab"] * df["bc"]
+    df["abs_pct"] = (df["implied"] / df["ac"] - 1.0).abs()
+    return df
 
 class FXTriangleRule(Rule):
     name = "relations.fx_triangle"
@@ -45,49 +62,44 @@ class FXTriangleRule(Rule):
         if ab is None or bc is None or ac is None:
             return []
 
-        def _dedup(s: pd.Series) -> pd.Series:
-            s = s.dropna().sort_index()
-            if not s.index.is_unique:
-                s = s.groupby(level=0).last()
-            return s
-
-        ab, bc, ac = _dedup(ab), _dedup(bc), _dedup(ac)
-
-        df = pd.DataFrame({"ab": ab, "bc": bc, "ac": ac}).dropna().sort_index()
+        df = _align_triangle(ab, bc, ac)
         if df.empty:
             return []
 
-        implied = df["ab"] * df["bc"]
-        abs_pct = (implied / df["ac"] - 1.0).abs()
+        abs_pct = df["abs_pct"]
 
         rule = self.name
         if self.rule_suffix:
             rule = f"{rule}.{self.rule_suffix}"
 
-        out: List[Issue] = []
-        breach = abs_pct > self.threshold_abs_pct
-        streak = breach.copy()
-        for _ in range(self.consecutive - 1):
-            streak = streak & streak.shift(1).fillna(False)
-
-        bad = abs_pct[streak]
-        for d, v in bad.items():
-            ratio = float(v / self.threshold_abs_pct)
-            sev = int(min(100, 60 + 40 * min(1.0, (ratio - 1.0) / 4.0)))  # 60 @ 1x, 100 @ 5x
-            out.append(
-                Issue(
-                    rule,
-                    d,
-                    sev,
-                    "source_switch",
-                    {
-                        "abs_pct": float(v),
-                        "threshold": float(self.threshold_abs_pct),
-                        "ratio": ratio,
-                        "consecutive": self.consecutive,
-                        "implied": float(implied.loc[d]),
-                        "observed": float(df["ac"].loc[d]),
-                    },
-                )
+        streak = n_consecutive(abs_pct > self.threshold_abs_pct, self.consecutive)
+        mask = streak.to_numpy(dtype=bool)
+        vals = abs_pct.to_numpy()[mask]
+        ratios = vals / self.threshold_abs_pct
+        # 60 @ 1x, 100 @ 5x
+        sevs = np.minimum(100, 60 + 40 * np.minimum(1.0, (ratios - 1.0) / 4.0)).astype(int)
+        out = [
+            Issue(
+                rule,
+                d,
+                sev,
+                "source_switch",
+                {
+                    "abs_pct": v,
+                    "threshold": float(self.threshold_abs_pct),
+                    "ratio": ratio,
+                    "consecutive": self.consecutive,
+                    "implied": imp,
+                    "observed": obs,
+                },
+            )
+            for d, sev, v, ratio, imp, obs in zip(
+                df.index[mask],
+                sevs.tolist(),
+                vals.tolist(),
+                ratios.tolist(),
+                df["implied"].to_numpy()[mask].tolist(),
+                df["ac"].to_numpy()[mask].tolist(),
             )
+        ]
         return out
@@ -4,6 +4,91 @@ import pandas as pd
 from typing import List
 from .base import Rule, Issue
 
+try:
+    from numba import njit
+except ImportError:  # optional: pip install .[fast]
+    njit = None
+
+try:
+    import bottleneck as bn
+except ImportError:  # optional: pip install .[fast]
+    bn = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _centered_median(x: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+        # same window bounds / NaN skipping as
+        # Series.rolling(window, center=True, min_periods).median(),
+        # sliding a sorted buffer (O(window) insert/remove) instead of re-sorting every window
+        n = x.shape[0]
+        offset = (window - 1) // 2
+        out = np.full(n, np.nan)
+        buf = np.empty(window)
+        m = 0
+        lo = 0
+        hi = 0
+        for i in range(n):
+            new_lo = max(0, i + offset + 1 - window)
+            new_hi = min(n, i + offset + 1)
+            while lo < new_lo:
+                v = x[lo]
+                lo += 1
+                if np.isnan(v):
+                    continue
+                k = np.searchsorted(buf[:m], v)
+                buf[k:m - 1] = buf[k + 1:m].copy()
+                m -= 1
+            while hi < new_hi:
+                v = x[hi]
+                hi += 1
+                if np.isnan(v):
+                    continue
+                k = np.searchsorted(buf[:m], v)
+                buf[k + 1:m + 1] = buf[k:m].copy()
+                buf[k] = v
+                m += 1
+            if m >= min_periods and m > 0:
+                h = m // 2
+                out[i] = buf[h] if m % 2 else (buf[h - 1] + buf[h]) / 2.0
+        return out
+
+    @njit(cache=True)
+    def _hampel_z(x: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+        med = _centered_median(x, window, min_periods)
+        mad = _centered_median(np.abs(x - med), window, min_periods)
+        z = np.full(x.shape[0], np.nan)
+        for i in range(x.shape[0]):
+            if mad[i] != 0.0:
+                z[i] = (x[i] - med[i]) / (1.4826 * mad[i])
+        return z
+else:
+    _hampel_z = None
+
+
+def _centered_move_median(x: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    # bn.move_median is trailing; pad the tail so trailing[i + offset] is the centered window at i.
+    # It also rejects window > len, so short series get leading NaNs too
+    # (skipped like missing values)
+    offset = (window - 1) // 2
+    head = max(0, window - len(x) - offset)
+    padded = np.concatenate((np.full(head, np.nan), x, np.full(offset, np.nan)))
+    return bn.move_median(padded, window, min_count=min_periods)[head + offset:]
+
+
+def _hampel_z_bn(x: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    med = _centered_move_median(x, window, min_periods)
+    mad = _centered_move_median(np.abs(x - med), window, min_periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mad != 0.0, (x - med) / (1.4826 * mad), np.nan)
+
+
+def _hampel_z_pandas(x: pd.Series, window: int, min_periods: int) -> np.ndarray:
+    med = x.rolling(window, center=True, min_periods=min_periods).median()
+    mad = (x - med).abs().rolling(window, center=True, min_periods=min_periods).median()
+    scale = 1.4826 * mad.replace(0.0, np.nan)
+    return ((x - med) / scale).to_numpy()
+
+
 class HampelRule(Rule):
     name = "spikes.hampel"
 
@@ -15,20 +100,27 @@ class HampelRule(Rule):
         x = series.dropna().astype(float)
         if len(x) < 30:
             return []
-        med = x.rolling(self.window, center=True, min_periods=max(10, self.window // 3)).median()
-        mad = (x - med).abs().rolling(self.window, center=True, min_periods=max(10, self.window // 3)).median()
-        scale = 1.4826 * mad.replace(0.0, np.nan)
-        z = (x - med) / scale
+        min_periods = max(10, self.window // 3)
+        if min_periods > self.window:
+            # same rejection as Series.rolling on every tier (the kernels would just return all-NaN)
+            raise ValueError(f"min_periods {min_periods} must be <= window {self.window}")
+        if _hampel_z is not None:
+            z = _hampel_z(np.ascontiguousarray(x.to_numpy(np.float64)), self.window, min_periods)
+        elif bn is not None:
+            z = _hampel_z_bn(x.to_numpy(np.float64), self.window, min_periods)
+        else:
+            z = _hampel_z_pandas(x, self.window, min_periods)
 
         out: List[Issue] = []
-        for d, zz in z.dropna().items():
-            if abs(zz) >= self.n_sigmas:
-                sev = int(min(100, 40 + 10 * abs(zz)))
-                out.append(Issue(
-                    rule=self.name,
-                    obs_date=d,
-                    severity=sev,
-                    suggested_action="winsorize" if abs(zz) < 12 else "remove",
-                    details={"z_robust": float(zz), "window": self.window, "n_sigmas": self.n_sigmas},
-                ))
+        # NaN compares False, so undefined z (zero MAD / short window) never flags
+        for i in np.flatnonzero(np.abs(z) >= self.n_sigmas):
+            zz = z[i]
+            sev = int(min(100, 40 + 10 * abs(zz)))
+            out.append(Issue(
+                rule=self.name,
+                obs_date=x.index[i],
+                severity=sev,
+                suggested_action="winsorize" if abs(zz) < 12 else "remove",
+                details={"z_robust": float(zz), "window": self.window, "n_sigmas": self.n_sigmas},
+            ))
         return out
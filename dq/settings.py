@@ -4,5 +4,10 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="DQ_", extra="ignore")
     database_url: str = "sqlite:///./dq.db"
     outputs_dir: str = "outputs"
+    # max worker threads for per-risk-factor ingestion / DQ sweeps (1 = serial)
+    parallelism: int = 16
+    # seconds a cached stooq / twelvedata / yfinance fetch is reused
+    # from outputs/fetch_cache (0 = off)
+    fetch_cache_ttl: int = 6 * 3600
 
 settings = Settings()
@@ -1,9 +1,14 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+import sys
 from typing import Any, Dict, List
 import yaml
 
+# libyaml's C loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 @dataclass(frozen=True)
 class SourceSpec:
     name: str
@@ -19,14 +24,34 @@ class RiskFactorSpec:
     unit: str
     sources: List[SourceSpec]
 
-def load_universe(path: str | Path) -> List[RiskFactorSpec]:
-    p = Path(path)
-    doc = yaml.safe_load(p.read_text(encoding="utf-8"))
+@lru_cache(maxsize=4)
+def _load_universe_cached(path: str, mtime_ns: int) -> tuple[RiskFactorSpec, ...]:
+    doc = yaml.load(Path(path).read_text(encoding="utf-8"), Loader=_YAML_LOADER)
     out: List[RiskFactorSpec] = []
     for rf in doc["risk_factors"]:
         sources = []
         for s in rf.get("sources", []):
             meta = {k: v for k, v in s.items() if k not in {"name", "symbol", "field"}}
-            sources.append(SourceSpec(s["name"], s["symbol"], s.get("field", "value"), meta or None))
-        out.append(RiskFactorSpec(rf["id"], rf["asset_class"], rf["description"], rf["unit"], sources))
-    return out
+            sources.append(
+                SourceSpec(
+                    sys.intern(s["name"]),
+                    s["symbol"],
+                    sys.intern(s.get("field", "value")),
+                    meta or None,
+                )
+            )
+        out.append(
+            RiskFactorSpec(
+                rf["id"],
+                sys.intern(rf["asset_class"]),
+                rf["description"],
+                sys.intern(rf["unit"]),
+                sources,
+            )
+        )
+    return tuple(out)
+
+def load_universe(path: str | Path) -> List[RiskFactorSpec]:
+    # parsed once per (file, mtime): editing the YAML invalidates the entry
+    p = Path(path).resolve()
+    return list(_load_universe_cached(str(p), p.stat().st_mtime_ns))
@@ -0,0 +1,18 @@
+import pytest
+
+from dq.db import init_db, reset_engine
+from dq.engine import clear_series_cache
+from dq.settings import settings
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # fresh SQLite file per test; the engine is cached per process, so rebuild it around the test
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'dq.db'}")
+    monkeypatch.setattr(settings, "outputs_dir", str(tmp_path / "outputs"))
+    reset_engine()
+    clear_series_cache()
+    init_db()
+    yield
+    clear_series_cache()
+    reset_engine()
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dq.rules.base import n_consecutive
+
+
+def _shift_loop(mask: pd.Series, n: int) -> pd.Series:
+    # the shifted-copies version n_consecutive replaced (NA counts as no breach)
+    streak = mask.astype("boolean").fillna(False).astype(bool)
+    for _ in range(n - 1):
+        streak = streak & streak.shift(1, fill_value=False)
+    return streak
+
+
+def _mask(values) -> pd.Series:
+    return pd.Series(values, index=pd.bdate_range("2024-01-01", periods=len(values)).date)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8])
+def test_all_false(n):
+    got = n_consecutive(_mask([False] * 6), n)
+    assert got.dtype == bool and not got.any()
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5])
+def test_all_true(n):
+    mask = _mask([True] * 6)
+    got = n_consecutive(mask, n)
+    assert got.index.equals(mask.index)
+    assert got.tolist() == [False] * (n - 1) + [True] * (6 - n + 1)
+
+
+def test_n_longer_than_mask():
+    assert not n_consecutive(_mask([True] * 3), 4).any()
+
+
+def test_empty():
+    got = n_consecutive(pd.Series([], dtype=bool), 3)
+    assert got.empty and got.dtype == bool
+
+
+@pytest.mark.parametrize("n", [1, 2, 3])
+def test_na_breaks_streak(n):
+    mask = _mask(pd.array([True, True, pd.NA, True, True, True, pd.NA, True], dtype="boolean"))
+    got = n_consecutive(mask, n)
+    assert got.dtype == bool
+    pd.testing.assert_series_equal(got, _shift_loop(mask, n))
+    assert not got.iloc[[2, 6]].any()
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 7])
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_shift_loop(n, seed):
+    rng = np.random.default_rng(seed)
+    mask = _mask(rng.random(60) < 0.7)
+    pd.testing.assert_series_equal(n_consecutive(mask, n), _shift_loop(mask, n))
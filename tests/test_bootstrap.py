@@ -0,0 +1,85 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlmodel import select
+
+from dq import bootstrap
+from dq.db import session
+from dq.models import DataSource, DQRunCache, Observation, RiskFactor
+
+ASOF = date(2024, 6, 28)
+
+
+def _seed():
+    days = pd.bdate_range("2024-01-01", ASOF)
+    rng = np.random.default_rng(0)
+    with session() as s:
+        for rf in ("US10Y", "US2Y", "SPX"):
+            asset_class = "equities" if rf == "SPX" else "rates"
+            s.add(RiskFactor(id=rf, asset_class=asset_class, description=rf, unit="x"))
+        ds = DataSource(name="stooq", symbol="x", field="value", meta={})
+        s.add(ds)
+        s.commit()
+        s.refresh(ds)
+        for rf in ("US10Y", "US2Y", "SPX"):
+            values = rng.normal(0, 0.01, len(days)).cumsum() + 4
+            for d, v in zip(days.date, values.tolist()):
+                s.add(Observation(risk_factor_id=rf, source_id=ds.id, obs_date=d, value=v))
+        s.commit()
+        return ds.id
+
+
+def _cache():
+    with session() as s:
+        return {c.risk_factor_id: c.dq_run_id for c in s.exec(select(DQRunCache)).all()}
+
+
+def test_unchanged_factors_are_skipped(db):
+    _seed()
+    run_ids, unchanged = bootstrap.run_dq_for_all(ASOF, 120, max_workers=1)
+    assert len(run_ids) == 3 and unchanged == []
+    first = _cache()
+    assert sorted(first.values()) == sorted(run_ids)
+
+    run_ids, unchanged = bootstrap.run_dq_for_all(ASOF, 120, max_workers=1)
+    assert run_ids == []
+    assert sorted(unchanged) == ["SPX", "US10Y", "US2Y"]
+    assert _cache() == first
+
+
+def test_force_reruns_and_updates_cache(db):
+    _seed()
+    bootstrap.run_dq_for_all(ASOF, 120, max_workers=1)
+    first = _cache()
+
+    run_ids, unchanged = bootstrap.run_dq_for_all(ASOF, 120, max_workers=1, force=True)
+    assert len(run_ids) == 3 and unchanged == []
+    # merge replaces the cached row per (risk factor, asof, lookback) instead of adding one
+    second = _cache()
+    assert set(second) == set(first)
+    assert sorted(second.values()) == sorted(run_ids)
+    assert all(second[k] != first[k] for k in first)
+
+
+def test_new_data_reruns_factor_and_its_dependents(db):
+    source_id = _seed()
+    bootstrap.run_dq_for_all(ASOF, 120, max_workers=1)
+    with session() as s:
+        # a late weekend print inside the window
+        late = date(2024, 6, 22)
+        s.add(Observation(risk_factor_id="US2Y", source_id=source_id, obs_date=late, value=4.0))
+        s.commit()
+
+    run_ids, unchanged = bootstrap.run_dq_for_all(ASOF, 120, max_workers=1)
+    # US10Y reads US2Y as its correlation peer
+    assert len(run_ids) == 2
+    assert unchanged == ["SPX"]
+
+
+def test_rule_change_invalidates_cache(db, monkeypatch):
+    _seed()
+    bootstrap.run_dq_for_all(ASOF, 120, max_workers=1)
+    monkeypatch.setattr(bootstrap, "rules_version", lambda: "changed")
+    run_ids, unchanged = bootstrap.run_dq_for_all(ASOF, 120, max_workers=1)
+    assert len(run_ids) == 3 and unchanged == []
@@ -0,0 +1,106 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dq.calendars import expected_dates, expected_index
+from dq.rules.gaps import MissingBdaysRule, StaleRule
+
+
+def _stale_loop(series: pd.Series, min_streak: int, atol: float):
+    # the streak-counter loop StaleRule replaced
+    s = series.dropna().sort_index()
+    if len(s) < min_streak + 1:
+        return []
+    out, streak = [], 0
+    for d, flag in (s.diff().abs() <= atol).fillna(False).items():
+        if flag:
+            streak += 1
+            if streak >= min_streak:
+                out.append((d, int(min(100, 30 + 12 * streak)), {"streak": streak}))
+        else:
+            streak = 0
+    return out
+
+
+def _series(values) -> pd.Series:
+    idx = pd.bdate_range("2024-01-01", periods=len(values)).date
+    return pd.Series(values, index=idx, dtype=float)
+
+
+CASES = {
+    "streak_at_start": [5, 5, 5, 5, 1, 2, 3, 4],
+    "streak_at_end": [1, 2, 3, 4, 7, 7, 7, 7, 7],
+    "exactly_min_streak": [1, 2, 2, 2, 2, 3, 4],
+    "one_short_of_min_streak": [1, 2, 2, 2, 3, 4],
+    "nan_inside_streak": [1, 2, 2, np.nan, 2, 2, 3],
+    "nan_between_streaks": [4, 4, 4, 4, np.nan, 5, 5, 5, 5, 6],
+    "all_flat": [3.0] * 15,
+    "no_streak": [1, 2, 3, 4, 5, 6],
+    "too_short": [1, 1, 1],
+    "within_atol": [1.0, 1.0004, 1.0008, 1.0011, 1.5, 1.5],
+}
+
+
+@pytest.mark.parametrize("atol", [0.0, 0.0005])
+@pytest.mark.parametrize("min_streak", [1, 3, 4])
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_stale_matches_streak_loop(case, min_streak, atol):
+    s = _series(CASES[case])
+    got = StaleRule(min_streak=min_streak, atol=atol).run(s)
+    assert all(i.rule == "gaps.stale" and i.suggested_action == "review" for i in got)
+    assert [(i.obs_date, i.severity, i.details) for i in got] == _stale_loop(s, min_streak, atol)
+
+
+def test_stale_unsorted_input():
+    s = _series([1, 2, 2, 2, 2, 2, 9, 8])
+    shuffled = s.iloc[np.random.default_rng(0).permutation(len(s))]
+    assert StaleRule().run(shuffled) == StaleRule().run(s)
+
+
+def test_stale_exactly_min_streak_flags_last_day():
+    s = _series(CASES["exactly_min_streak"])
+    got = StaleRule(min_streak=3).run(s)
+    assert [(i.obs_date, i.details["streak"]) for i in got] == [(s.index[4], 3)]
+
+
+def _missing_set(series: pd.Series, expected) -> list:
+    # the Python set version MissingBdaysRule replaced
+    s = series.dropna().sort_index()
+    if s.empty:
+        return []
+    if expected is None:
+        expected = set(pd.bdate_range(min(s.index), max(s.index)).date)
+    observed = set(s.index)
+    return sorted(d for d in expected if d not in observed)
+
+
+@pytest.mark.parametrize("asset_class", ["equities", "rates", "fx", "commodities"])
+@pytest.mark.parametrize("seed", range(3))
+def test_missing_bdays_matches_set_difference(asset_class, seed):
+    # spans Christmas, Good Friday, Easter Monday, July 4...
+    start, end = date(2023, 12, 1), date(2025, 1, 31)
+    idx = expected_index(asset_class, start, end)
+    assert len(idx) < len(pd.bdate_range(start, end)) or asset_class == "commodities"
+    rng = np.random.default_rng(seed)
+    keep = rng.random(len(idx)) > 0.05
+    # plus a holiday and a weekend print
+    dates = list(idx.date[keep]) + [date(2024, 12, 25), date(2024, 7, 6)]
+    values = rng.normal(size=len(dates))
+    values[rng.random(len(dates)) < 0.02] = np.nan
+    s = pd.Series(values, index=dates).iloc[rng.permutation(len(dates))]
+
+    want = _missing_set(s, expected_dates(asset_class, start, end))
+    assert want
+    for expected in (expected_dates(asset_class, start, end), set(idx.date), idx):
+        got = MissingBdaysRule().run(s, expected_dates=expected)
+        assert [i.obs_date for i in got] == want
+        assert all(type(i.obs_date) is date and i.severity == 55 for i in got)
+    assert [i.obs_date for i in MissingBdaysRule().run(s)] == _missing_set(s, None)
+
+
+def test_missing_bdays_empty_series():
+    s = pd.Series([np.nan, np.nan], index=[date(2024, 1, 2), date(2024, 1, 3)])
+    expected = expected_index("equities", date(2024, 1, 1), date(2024, 1, 5))
+    assert MissingBdaysRule().run(s, expected_dates=expected) == []
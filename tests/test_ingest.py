@@ -0,0 +1,65 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from dq import ingest
+from dq.db import session
+from dq.models import Observation
+from dq.providers.base import Provider, SeriesData
+from dq.universe import RiskFactorSpec
+
+HISTORY = pd.bdate_range("2024-01-01", "2024-03-29")
+
+
+class FullHistoryProvider(Provider):
+    """Ignores the requested range (like Stooq's full-history CSV), so stored dates come back."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, symbol, start, end, **kwargs):
+        self.calls.append((start, end))
+        df = pd.DataFrame({"value": range(len(HISTORY))}, index=HISTORY, dtype=float)
+        return SeriesData(df=df, provider=self.name, symbol=symbol)
+
+
+def _rows():
+    with session() as s:
+        return s.exec(select(func.count()).select_from(Observation)).one()
+
+
+def _n_bdays(start, end):
+    return len(pd.bdate_range(start, end))
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_overlapping_ingests_count_only_new_rows(db, monkeypatch, bulk):
+    provider = FullHistoryProvider()
+    monkeypatch.setattr(ingest, "get_provider", lambda name: provider)
+    ingest.upsert_risk_factor(RiskFactorSpec("SPX", "equities", "d", "x", []))
+
+    def run(start, end):
+        return ingest.ingest_series("SPX", "fake", "spx", start, end, "value", {}, bulk=bulk)
+
+    assert run(date(2024, 1, 1), date(2024, 1, 31)) == _n_bdays("2024-01-01", "2024-01-31")
+    assert _rows() == 23
+
+    # only Feb is uncovered; the provider still returns January, which ON CONFLICT drops
+    assert run(date(2024, 1, 15), date(2024, 2, 15)) == _n_bdays("2024-02-01", "2024-02-15")
+    assert provider.calls[-1] == (date(2024, 2, 1), date(2024, 2, 15))
+    assert _rows() == 23 + 11
+
+    # fully covered: no vendor call, nothing inserted
+    n_calls = len(provider.calls)
+    assert run(date(2024, 1, 10), date(2024, 2, 10)) == 0
+    assert len(provider.calls) == n_calls
+    assert _rows() == 34
+
+    # backfill + top-up around the stored range
+    assert run(date(2023, 12, 1), date(2024, 2, 29)) == _n_bdays("2024-02-16", "2024-02-29")
+    assert _rows() == 34 + 10
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dq.rules import spikes
+from dq.rules.spikes import HampelRule
+
+WINDOWS = [10, 15, 21, 31]
+
+
+def _series(seed: int, n: int = 200) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    x = np.round(rng.normal(0, 1, n).cumsum(), 1)  # rounding -> ties in the windows
+    x[[40, 120]] += 15.0  # spikes
+    x[60:90] = x[60]  # flat stretch -> zero MAD
+    idx = pd.bdate_range("2024-01-01", periods=n).date
+    return pd.Series(x, index=idx)
+
+
+def _with_gaps(s: pd.Series) -> pd.Series:
+    s = s.copy()
+    s.iloc[[5, 6, 7, 50, 130, 131]] = np.nan
+    return s
+
+
+def _tiers():
+    tiers = {"pandas": lambda x, w, mp: spikes._hampel_z_pandas(pd.Series(x), w, mp)}
+    if spikes.bn is not None:
+        tiers["bottleneck"] = spikes._hampel_z_bn
+    if spikes._hampel_z is not None:
+        tiers["numba"] = spikes._hampel_z
+    return tiers
+
+
+def _assert_kernels_match(x, window, min_periods, expected):
+    for name, kernel in _tiers().items():
+        got = kernel(x, window, min_periods)
+        np.testing.assert_allclose(got, expected, rtol=1e-12, atol=0, equal_nan=True, err_msg=name)
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("gaps", [False, True])
+def test_kernels_match_pandas(window, gaps):
+    s = _series(window)
+    if gaps:
+        s = _with_gaps(s)
+    x = s.to_numpy(np.float64)
+    min_periods = max(10, window // 3)
+    expected = _tiers()["pandas"](x, window, min_periods)
+    assert np.isnan(expected).any()  # zero-MAD stretch leaves z undefined
+    _assert_kernels_match(x, window, min_periods, expected)
+
+
+def _run_on_tier(monkeypatch, tier: str, rule: HampelRule, s: pd.Series):
+    if tier in ("bottleneck", "pandas"):
+        monkeypatch.setattr(spikes, "_hampel_z", None)
+    if tier == "pandas":
+        monkeypatch.setattr(spikes, "bn", None)
+    return rule.run(s)
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+def test_rule_flags_match_across_tiers(monkeypatch, window):
+    s = _with_gaps(_series(100 + window))
+    rule = HampelRule(window=window)
+    results = {}
+    for tier in _tiers():
+        with monkeypatch.context() as m:
+            results[tier] = _run_on_tier(m, tier, rule, s)
+    expected = results.pop("pandas")
+    assert {i.obs_date for i in expected} >= {s.index[40], s.index[120]}
+    for tier, issues in results.items():
+        assert [(i.obs_date, i.severity, i.suggested_action) for i in issues] == [
+            (i.obs_date, i.severity, i.suggested_action) for i in expected
+        ], tier
+        for a, b in zip(issues, expected):
+            assert a.details["z_robust"] == pytest.approx(b.details["z_robust"], rel=1e-12)
+
+
+@pytest.mark.parametrize("tier", ["numba", "bottleneck", "pandas"])
+def test_window_smaller_than_min_periods_is_rejected(monkeypatch, tier):
+    if tier not in _tiers():
+        pytest.skip(f"{tier} not installed")
+    with pytest.raises(ValueError, match="min_periods 10 must be <= window 5"):
+        _run_on_tier(monkeypatch, tier, HampelRule(window=5), _series(0))
+
+
+@pytest.mark.parametrize("window", [40, 60, 84, 85, 90, 200])
+def test_window_longer_than_series(monkeypatch, window):
+    rng = np.random.default_rng(7)
+    s = pd.Series(rng.normal(0, 1, 40), index=pd.bdate_range("2024-01-01", periods=40).date)
+    s.iloc[20] += 15.0
+    x = s.to_numpy(np.float64)
+    min_periods = max(10, window // 3)
+    expected = _tiers()["pandas"](x, window, min_periods)
+    _assert_kernels_match(x, window, min_periods, expected)
+    flagged = {}
+    for tier in _tiers():
+        with monkeypatch.context() as m:
+            issues = _run_on_tier(m, tier, HampelRule(window=window), s)
+        flagged[tier] = [i.obs_date for i in issues]
+    # window=200 needs 66 points, so nothing is scored there
+    expected_dates = [s.index[20]] if min_periods <= len(s) else []
+    assert all(dates == expected_dates for dates in flagged.values()), flagged